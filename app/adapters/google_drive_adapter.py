@@ -1,17 +1,325 @@
-from typing import List, Optional, Dict, Any
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 import os
+import json
 import asyncio
+import atexit
+import functools
+import threading
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import httpx
+from cachetools import TTLCache
 
 from app.models.models import UserContext, SearchResult, DocumentContent, RecentUpdate, DocumentSource
 from app.utils.logger import logger
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception
+
+# google-auth and google-auth-oauthlib are only imported when real Drive
+# credentials are needed, so mock mode never loads them.
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+try:
+    from ciso8601 import parse_datetime as _parse_timestamp
+except ImportError:
+    # datetime.fromisoformat accepts Drive's trailing 'Z' from Python 3.11
+    _parse_timestamp = datetime.fromisoformat
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Dedicated pool for the blocking google-auth credential load/refresh so it
+# doesn't compete with FastAPI's default executor.
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GDRIVE_WORKERS", "16")),
+    thread_name_prefix="gdrive"
+)
+atexit.register(_EXECUTOR.shutdown, wait=False)
+
+# Credentials are shared across adapter instances and refreshed shortly
+# before they expire
+_CREDENTIALS_CACHE: Dict[str, Credentials] = {}
+_CACHE_LOCK = threading.Lock()
+_REFRESH_MARGIN = timedelta(seconds=60)
+
+# Recently fetched documents and in-flight fetches, keyed by (user_id, doc_id)
+_document_cache = TTLCache(maxsize=256, ttl=int(os.getenv("GDRIVE_DOCUMENT_CACHE_TTL", "60")))
+_inflight_documents: Dict[tuple, asyncio.Task] = {}
+
+
+def _forget_inflight_document(key: tuple, task: asyncio.Task):
+    """Drop a finished fetch, marking its exception retrieved in case no caller is left"""
+    if _inflight_documents.get(key) is task:
+        del _inflight_documents[key]
+    if not task.cancelled():
+        task.exception()
+
+
+# Drive REST API is called directly over a shared async HTTP client
+_API_BASE_URL = "https://www.googleapis.com/drive/v3"
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Document content is truncated to this many characters, so downloads are
+# capped with a Range header rather than fetching whole files.
+_MAX_CONTENT_CHARS = 10000
+_CONTENT_RANGE = {"Range": f"bytes=0-{_MAX_CONTENT_CHARS * 4 // 3}"}
+
+# Backslashes and single quotes must be escaped inside Drive query string literals
+_QUERY_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", "'": "\\'"})
+
+# Drive responses that are safe to retry
+_TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Drive caps pageSize; larger requests are paginated
+_MAX_PAGE_SIZE = 100
+
+# Upper bound on files listed per call, whatever the caller asks for, so one
+# request can never page through a user's whole Drive
+_MAX_LISTED_FILES = 100
+
+# Partial-response field selectors, limited to what the result models consume
+_SEARCH_FIELDS = "nextPageToken,files(id,name,description,webViewLink,modifiedTime,owners(displayName,me),mimeType)"
+_DOCUMENT_FIELDS = "id,name,description,webViewLink,modifiedTime,owners(displayName),mimeType"
+_UPDATE_FIELDS = "nextPageToken,files(id,name,description,webViewLink,modifiedTime,lastModifyingUser(displayName),createdTime)"
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for Drive API calls"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # HTTP/2 multiplexes concurrent Drive calls over one kept-alive TLS session
+        _http_client = httpx.AsyncClient(
+            base_url=_API_BASE_URL,
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=200,
+                max_connections=400
+            )
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared Drive API client; call once when the process shuts down"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _credentials_fresh(creds: Optional[Credentials]) -> bool:
+    """Check whether credentials are valid and not about to expire"""
+    if not creds or not creds.valid:
+        return False
+    # Credentials.expiry is a naive UTC datetime
+    return creds.expiry is None or creds.expiry - datetime.utcnow() > _REFRESH_MARGIN
+
+
+_NO_OWNER: Dict[str, Any] = {}
+
+
+def _truncate(text: str, limit: int = 200) -> str:
+    """Truncate text to limit characters, marking cut text with an ellipsis"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _file_to_search_result(file: Dict[str, Any]) -> SearchResult:
+    """Convert a Drive file resource into a SearchResult"""
+    get = file.get
+    name = get('name', 'Untitled')
+    owners = get('owners') or ()
+    
+    # Generate snippet from description or file name
+    snippet = get('description') or f"Document: {name} - {get('mimeType', 'Unknown type')}"
+    
+    return SearchResult(
+        id=f"gdrive:{file['id']}",
+        title=name,
+        snippet=_truncate(snippet),
+        url=get('webViewLink', ''),
+        source=DocumentSource.gdrive,
+        last_modified=get('modifiedTime') or datetime.now().isoformat(),
+        author=(owners[0] if owners else _NO_OWNER).get('displayName', 'Unknown'),
+        # Access level is simplified to owner vs viewer
+        access_level="owner" if any(owner.get('me') for owner in owners) else "viewer"
+    )
+
+
+def _file_to_recent_update(file: Dict[str, Any]) -> RecentUpdate:
+    """Convert a Drive file resource into a RecentUpdate"""
+    get = file.get
+    name = get('name', 'Untitled')
+    
+    # Files modified within a minute of creation count as newly created
+    created_time = _parse_timestamp(get('createdTime', ''))
+    modified_time = _parse_timestamp(get('modifiedTime', ''))
+    created = (modified_time - created_time).total_seconds() < 60
+    
+    snippet = get('description') or f"{'Created' if created else 'Modified'} document: {name}"
+    
+    return RecentUpdate(
+        id=f"gdrive:{file['id']}",
+        title=name,
+        snippet=_truncate(snippet),
+        url=get('webViewLink', ''),
+        source=DocumentSource.gdrive,
+        last_modified=get('modifiedTime') or datetime.now().isoformat(),
+        author=(get('lastModifyingUser') or _NO_OWNER).get('displayName', 'Unknown'),
+        update_type="created" if created else "modified"
+    )
+
+
+def _convert_files(files: List[Dict[str, Any]], convert) -> list:
+    """Convert a page of Drive files, skipping malformed rows.
+
+    The whole page is converted in one pass; rows are only retried one at a
+    time (so bad ones can be logged and dropped) when that pass fails.
+    """
+    try:
+        return [convert(file) for file in files]
+    except Exception:
+        pass
+    
+    converted = []
+    for file in files:
+        try:
+            converted.append(convert(file))
+        except Exception as e:
+            logger.warning(f"Error processing Drive file {file.get('id', '?')}: {e}")
+    return converted
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Check whether a failure (or the error it wraps) is worth retrying"""
+    while exc is not None:
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in _TRANSIENT_STATUS_CODES
+        if isinstance(exc, httpx.TransportError):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+# Only rate limiting, server errors and network failures are retried; client
+# errors such as 401/403/404 fail immediately.
+_drive_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(multiplier=2, max=10),
+    retry=retry_if_exception(_is_transient),
+    reraise=True
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _mime_type_clause(file_types: tuple) -> str:
+    """Build the OR-ed mimeType filter for a sorted tuple of MIME types"""
+    return " or ".join(f"mimeType='{file_type}'" for file_type in file_types)
+
+
+# Mock data for development. Timestamps are stored as ages relative to the
+# time of the request; search templates are formatted with the query.
+_MOCK_SEARCH_TEMPLATES = (
+    {
+        "id": "gdrive:1BxY2zW3vU4sR5qP6oN7mL8kJ9hG",
+        "title": "Project Document - {query}",
+        "snippet": "This document contains comprehensive information about {query} including project details, timelines, and deliverables. Last updated with new requirements and scope changes.",
+        "url": "https://docs.google.com/document/d/1BxY2zW3vU4sR5qP6oN7mL8kJ9hG/edit",
+        "age": timedelta(0),
+        "author": "John Smith",
+        "access_level": "editor"
+    },
+    {
+        "id": "gdrive:2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG",
+        "title": "Meeting Notes - {query} Discussion",
+        "snippet": "Detailed notes from the {query} meeting held last week. Includes action items, decisions made, and follow-up tasks assigned to team members.",
+        "url": "https://docs.google.com/document/d/2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG/edit",
+        "age": timedelta(days=2),
+        "author": "Sarah Johnson",
+        "access_level": "viewer"
+    },
+    {
+        "id": "gdrive:3DzA4yX5wV6tS7rQ8pO9nM0lK1iH",
+        "title": "{query} Presentation",
+        "snippet": "Slide deck for the {query} presentation to stakeholders. Contains charts, graphs, and key metrics showing project progress and outcomes.",
+        "url": "https://docs.google.com/presentation/d/3DzA4yX5wV6tS7rQ8pO9nM0lK1iH/edit",
+        "age": timedelta(hours=6),
+        "author": "Mike Chen",
+        "access_level": "editor"
+    }
+)
+
+_MOCK_DOCUMENT_CONTENT = """# Project Proposal: Workplace Search Enhancement
+
+## Executive Summary
+This document outlines the comprehensive plan for enhancing our workplace search capabilities by integrating multiple document sources including Google Drive, Notion, Slack, and Confluence.
+
+## Project Objectives
+1. Improve document discoverability across platforms
+2. Reduce time spent searching for information
+3. Enhance team collaboration and knowledge sharing
+4. Implement secure, role-based access controls
+
+## Technical Architecture
+The solution will implement a Model Context Protocol (MCP) server that provides unified search capabilities across:
+- Google Drive documents and files
+- Notion pages and databases
+- Slack messages and files
+- Confluence spaces and pages
+
+## Implementation Timeline
+- Phase 1: Core MCP server development (4 weeks)
+- Phase 2: Google Drive integration (2 weeks)
+- Phase 3: Additional source integrations (6 weeks)
+- Phase 4: Testing and deployment (2 weeks)
+
+## Resource Requirements
+- 2 Senior developers
+- 1 DevOps engineer
+- 1 Product manager
+- Cloud infrastructure costs: $500/month
+
+## Expected Outcomes
+- 60% reduction in document search time
+- Improved team productivity
+- Better knowledge management
+- Enhanced security and compliance"""
+
+_MOCK_RECENT_UPDATE_TEMPLATES = (
+    {
+        "id": "gdrive:1BxY2zW3vU4sR5qP6oN7mL8kJ9hG",
+        "title": "Q4 Budget Planning",
+        "snippet": "Updated quarterly budget allocations and revised spending projections based on current market conditions.",
+        "url": "https://docs.google.com/spreadsheets/d/1BxY2zW3vU4sR5qP6oN7mL8kJ9hG/edit",
+        "age": timedelta(hours=2),
+        "author": "Finance Team",
+        "update_type": "modified"
+    },
+    {
+        "id": "gdrive:2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG",
+        "title": "Team Performance Review Template",
+        "snippet": "Created new template for annual performance reviews with updated criteria and evaluation metrics.",
+        "url": "https://docs.google.com/document/d/2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG/edit",
+        "age": timedelta(days=1),
+        "author": "HR Department",
+        "update_type": "created"
+    },
+    {
+        "id": "gdrive:3DzA4yX5wV6tS7rQ8pO9nM0lK1iH",
+        "title": "Project Timeline Update",
+        "snippet": "Revised project milestones and deliverable dates to accommodate new requirements and resource constraints.",
+        "url": "https://docs.google.com/document/d/3DzA4yX5wV6tS7rQ8pO9nM0lK1iH/edit",
+        "age": timedelta(days=2, hours=5),
+        "author": "Project Manager",
+        "update_type": "modified"
+    }
+)
 
 
 class GoogleDriveOAuthHandler:
@@ -27,18 +335,25 @@ class GoogleDriveOAuthHandler:
     
     def get_credentials(self) -> Optional[Credentials]:
         """Get valid credentials for Google Drive API"""
-        creds = None
+        # Reuse in-process credentials while they are still fresh
+        with _CACHE_LOCK:
+            creds = _CREDENTIALS_CACHE.get(self.token_path)
+        if _credentials_fresh(creds):
+            return creds
+        
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
         
         # Load existing token
-        if os.path.exists(self.token_path):
+        if creds is None and os.path.exists(self.token_path):
             try:
                 creds = Credentials.from_authorized_user_file(self.token_path, self.scopes)
             except Exception as e:
                 logger.error(f"Error loading saved credentials: {e}")
         
         # If there are no (valid) credentials available, let the user log in
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
+        if not _credentials_fresh(creds):
+            if creds and creds.refresh_token:
                 try:
                     creds.refresh(Request())
                     logger.info("Refreshed Google Drive credentials")
@@ -48,6 +363,7 @@ class GoogleDriveOAuthHandler:
             
             if not creds and os.path.exists(self.credentials_path):
                 try:
+                    from google_auth_oauthlib.flow import Flow
                     flow = Flow.from_client_secrets_file(self.credentials_path, self.scopes)
                     flow.redirect_uri = 'http://localhost:8080'
                     
@@ -66,6 +382,9 @@ class GoogleDriveOAuthHandler:
                 logger.info("Saved Google Drive credentials")
             except Exception as e:
                 logger.error(f"Error saving credentials: {e}")
+            
+            with _CACHE_LOCK:
+                _CREDENTIALS_CACHE[self.token_path] = creds
         
         return creds
 
@@ -82,41 +401,82 @@ class GoogleDriveAdapter:
         'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'text/plain',
         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'text/csv'
     }
+    _SUPPORTED_MIME_SET = frozenset(SUPPORTED_MIME_TYPES)
+    # Google Workspace formats have no binary content and must be exported
+    _GOOGLE_WORKSPACE_MIMES = frozenset(
+        mime for mime in SUPPORTED_MIME_TYPES if mime.startswith('application/vnd.google-apps')
+    )
     
     def __init__(self, user_context: UserContext):
         self.user_context = user_context
-        self.api_base_url = "https://www.googleapis.com/drive/v3"
+        self.api_base_url = _API_BASE_URL
         self.oauth_handler = GoogleDriveOAuthHandler()
-        self._service = None
         self._credentials = None
         
         # Use environment variables for production
         self.use_production_api = os.getenv("GOOGLE_DRIVE_PRODUCTION", "false").lower() == "true"
     
-    async def _get_service(self):
-        """Get authenticated Google Drive service"""
-        if self._service is None:
-            if self.use_production_api:
-                self._credentials = self.oauth_handler.get_credentials()
-                if self._credentials:
-                    # Run in thread pool since Google API client is synchronous
-                    loop = asyncio.get_event_loop()
-                    self._service = await loop.run_in_executor(
-                        None, 
-                        lambda: build('drive', 'v3', credentials=self._credentials)
-                    )
-                else:
-                    logger.warning("No valid Google Drive credentials available")
-                    return None
-            else:
-                logger.info("Using mock Google Drive service for development")
-                return None
-        return self._service
+    async def _get_credentials(self) -> Optional[Credentials]:
+        """Get credentials for the Drive API, or None in mock mode"""
+        if not self.use_production_api:
+            logger.info("Using mock Google Drive service for development")
+            return None
+        
+        if not _credentials_fresh(self._credentials):
+            # Loading and refreshing credentials is blocking I/O
+            self._credentials = await asyncio.get_running_loop().run_in_executor(
+                _EXECUTOR, self.oauth_handler.get_credentials
+            )
+            if not self._credentials:
+                logger.warning("No valid Google Drive credentials available")
+        return self._credentials
+    
+    async def _get(self, path: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None) -> httpx.Response:
+        """Issue an authenticated GET against the Drive API"""
+        request_headers = {"Authorization": f"Bearer {self._credentials.token}"}
+        if headers:
+            request_headers.update(headers)
+        response = await _get_http_client().get(path, params=params, headers=request_headers)
+        response.raise_for_status()
+        return response
+    
+    async def _get_json(self, path: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """GET a Drive API resource and decode the JSON body"""
+        response = await self._get(path, params)
+        return _json_loads(response.content)
+    
+    async def _iter_file_pages(self, max_results: int, **params):
+        """Yield pages of files up to max_results, prefetching the next page
+        while the caller processes the current one"""
+        max_results = min(max_results, _MAX_LISTED_FILES)
+        params["pageSize"] = min(max_results, _MAX_PAGE_SIZE)
+        
+        def _fetch(page_token: Optional[str]):
+            page_params = params if page_token is None else {**params, "pageToken": page_token}
+            return asyncio.ensure_future(self._get_json("/files", page_params))
+        
+        remaining = max_results
+        pending = _fetch(None)
+        try:
+            while pending is not None:
+                result = await pending
+                files = result.get('files', [])[:remaining]
+                remaining -= len(files)
+                
+                next_token = result.get('nextPageToken')
+                pending = None
+                if next_token and remaining > 0:
+                    pending = _fetch(next_token)
+                
+                yield files
+        finally:
+            if pending is not None:
+                pending.cancel()
     
     def _build_search_query(self, query: str, file_types: List[str] = None) -> str:
         """Build Google Drive search query with advanced filters"""
         # Escape special characters in query
-        escaped_query = query.replace("'", "\\'")
+        escaped_query = query.translate(_QUERY_ESCAPE_TABLE)
         
         # Base search in content and name
         search_parts = [
@@ -126,83 +486,42 @@ class GoogleDriveAdapter:
         
         # Add file type filters
         if file_types:
-            mime_type_conditions = []
-            for file_type in file_types:
-                if file_type in self.SUPPORTED_MIME_TYPES:
-                    mime_type_conditions.append(f"mimeType='{file_type}'")
-            if mime_type_conditions:
-                search_parts.append(f"({' or '.join(mime_type_conditions)})")
+            supported_types = tuple(sorted(self._SUPPORTED_MIME_SET.intersection(file_types)))
+            if supported_types:
+                search_parts.append(_mime_type_clause(supported_types))
         
         # Exclude trashed files
         search_parts.append("trashed=false")
         
-        return " and ".join([f"({part})" for part in search_parts[:2]]) + " and " + " and ".join(search_parts[2:])
+        return " and ".join(f"({part})" for part in search_parts)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((HttpError, Exception))
-    )
+    @_drive_retry
     async def search(self, query: str, max_results: int) -> List[SearchResult]:
         """Search Google Drive for documents matching the query"""
         logger.info(f"Searching Google Drive for: '{query}' (max_results: {max_results})")
         
         try:
-            service = await self._get_service()
+            credentials = await self._get_credentials()
             
-            if not service and self.use_production_api:
+            if not credentials and self.use_production_api:
                 logger.error("Google Drive service not available")
                 return []
             
-            if service:
+            if credentials:
                 # Production API call
                 search_query = self._build_search_query(query)
                 logger.debug(f"Google Drive search query: {search_query}")
                 
-                # Run in thread pool since Google API client is synchronous
-                loop = asyncio.get_event_loop()
-                
-                def _search():
-                    return service.files().list(
-                        q=search_query,
-                        fields="files(id,name,description,webViewLink,modifiedTime,owners,mimeType,size,thumbnailLink)",
-                        pageSize=min(max_results, 100),
-                        orderBy="modifiedTime desc"
-                    ).execute()
-                
-                result = await loop.run_in_executor(None, _search)
-                files = result.get('files', [])
+                pages = self._iter_file_pages(
+                    max_results,
+                    q=search_query,
+                    fields=_SEARCH_FIELDS,
+                    orderBy="modifiedTime desc"
+                )
                 
                 search_results = []
-                for file in files:
-                    try:
-                        # Extract owner information
-                        owners = file.get('owners', [])
-                        author = owners[0].get('displayName', 'Unknown') if owners else 'Unknown'
-                        
-                        # Generate snippet from description or file name
-                        snippet = file.get('description', '')
-                        if not snippet:
-                            snippet = f"Document: {file.get('name', 'Untitled')} - {file.get('mimeType', 'Unknown type')}"
-                        
-                        # Determine access level (simplified)
-                        access_level = "viewer"  # Default to viewer
-                        if owners and any(owner.get('me', False) for owner in owners):
-                            access_level = "owner"
-                        
-                        search_results.append(SearchResult(
-                            id=f"gdrive:{file['id']}",
-                            title=file.get('name', 'Untitled'),
-                            snippet=snippet[:200] + "..." if len(snippet) > 200 else snippet,
-                            url=file.get('webViewLink', ''),
-                            source=DocumentSource.gdrive,
-                            last_modified=file.get('modifiedTime', datetime.now().isoformat()),
-                            author=author,
-                            access_level=access_level
-                        ))
-                    except Exception as e:
-                        logger.warning(f"Error processing search result: {e}")
-                        continue
+                async for files in pages:
+                    search_results.extend(_convert_files(files, _file_to_search_result))
                 
                 logger.info(f"Found {len(search_results)} results in Google Drive")
                 return search_results
@@ -211,46 +530,84 @@ class GoogleDriveAdapter:
                 # Mock response for development
                 return await self._get_mock_search_results(query, max_results)
                 
-        except HttpError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Google Drive API error during search: {e}")
-            if e.resp.status == 403:
-                raise Exception("Google Drive API quota exceeded or access denied")
-            elif e.resp.status == 401:
-                raise Exception("Google Drive authentication failed")
+            if e.response.status_code == 403:
+                raise Exception("Google Drive API quota exceeded or access denied") from e
+            elif e.response.status_code == 401:
+                raise Exception("Google Drive authentication failed") from e
             else:
-                raise Exception(f"Google Drive API error: {e}")
+                raise Exception(f"Google Drive API error: {e}") from e
         except Exception as e:
             logger.error(f"Error searching Google Drive: {e}")
-            raise Exception(f"Failed to search Google Drive: {e}")
+            raise Exception(f"Failed to search Google Drive: {e}") from e
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((HttpError, Exception))
-    )
     async def get_document(self, doc_id: str) -> DocumentContent:
-        """Get document content from Google Drive"""
+        """Get document content from Google Drive.
+
+        Concurrent requests for the same document share a single fetch, and
+        results are kept briefly so repeated reads skip the Drive round-trip.
+        """
+        key = (self.user_context.user_id, doc_id)
+        document = _document_cache.get(key)
+        if document is not None:
+            return document
+        
+        task = _inflight_documents.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_cache(key, doc_id))
+            _inflight_documents[key] = task
+            task.add_done_callback(functools.partial(_forget_inflight_document, key))
+        # Shielded, so a cancelled caller never aborts the fetch for the others
+        return await asyncio.shield(task)
+    
+    async def _fetch_and_cache(self, key: tuple, doc_id: str) -> DocumentContent:
+        """Fetch a document and keep it for repeated reads"""
+        document = await self._fetch_document(doc_id)
+        _document_cache[key] = document
+        return document
+    
+    async def get_documents(self, doc_ids: List[str]) -> List[DocumentContent]:
+        """Get several documents from Google Drive in one call.
+
+        Drive has no batch-get for file content, so the fetches run
+        concurrently over the shared HTTP/2 client. Documents that fail are
+        logged and left out; the rest keep the order of doc_ids.
+        """
+        # Load credentials once up front rather than once per concurrent fetch
+        await self._get_credentials()
+        
+        outcomes = await asyncio.gather(
+            *(self.get_document(doc_id) for doc_id in doc_ids),
+            return_exceptions=True
+        )
+        documents = []
+        for doc_id, outcome in zip(doc_ids, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error fetching document {doc_id}: {outcome}")
+            else:
+                documents.append(outcome)
+        return documents
+    
+    @_drive_retry
+    async def _fetch_document(self, doc_id: str) -> DocumentContent:
+        """Fetch document metadata and content from Google Drive"""
         logger.info(f"Fetching Google Drive document: {doc_id}")
         
         try:
-            service = await self._get_service()
+            credentials = await self._get_credentials()
             
-            if not service and self.use_production_api:
+            if not credentials and self.use_production_api:
                 logger.error("Google Drive service not available")
                 raise Exception("Google Drive service not available")
             
-            if service:
+            if credentials:
                 # Production API call
-                loop = asyncio.get_event_loop()
-                
-                # Get file metadata
-                def _get_metadata():
-                    return service.files().get(
-                        fileId=doc_id,
-                        fields="id,name,description,webViewLink,modifiedTime,owners,mimeType,size"
-                    ).execute()
+                file_path = f"/files/{quote(doc_id, safe='')}"
                 
-                metadata = await loop.run_in_executor(None, _get_metadata)
+                # The MIME type decides how content is fetched: Google Workspace
+                # files reject alt=media and must be exported instead
+                metadata = await self._get_json(file_path, {"fields": _DOCUMENT_FIELDS})
                 
                 # Get file content based on MIME type
                 content = ""
@@ -259,23 +616,16 @@ class GoogleDriveAdapter:
                 if mime_type in self.SUPPORTED_MIME_TYPES:
                     export_mime_type = self.SUPPORTED_MIME_TYPES[mime_type]
                     
-                    def _get_content():
-                        if mime_type.startswith('application/vnd.google-apps'):
-                            # Export Google Workspace documents
-                            return service.files().export(
-                                fileId=doc_id,
-                                mimeType=export_mime_type
-                            ).execute()
-                        else:
-                            # Get binary files
-                            return service.files().get_media(fileId=doc_id).execute()
-                    
                     try:
-                        content_bytes = await loop.run_in_executor(None, _get_content)
-                        if isinstance(content_bytes, bytes):
-                            content = content_bytes.decode('utf-8', errors='ignore')
+                        if mime_type in self._GOOGLE_WORKSPACE_MIMES:
+                            # Export Google Workspace documents; the export endpoint ignores Range
+                            media = await self._get(
+                                f"{file_path}/export",
+                                {"mimeType": export_mime_type}
+                            )
                         else:
-                            content = str(content_bytes)
+                            media = await self._get(file_path, {"alt": "media"}, _CONTENT_RANGE)
+                        content = media.content.decode('utf-8', errors='ignore')
                     except Exception as e:
                         logger.warning(f"Could not extract content from document {doc_id}: {e}")
                         content = f"Content not available for {mime_type} files"
@@ -289,7 +639,7 @@ class GoogleDriveAdapter:
                 return DocumentContent(
                     id=f"gdrive:{metadata['id']}",
                     title=metadata.get('name', 'Untitled'),
-                    content=content[:10000],  # Limit content size
+                    content=content[:_MAX_CONTENT_CHARS],  # Limit content size
                     source=DocumentSource.gdrive,
                     url=metadata.get('webViewLink', ''),
                     last_modified=metadata.get('modifiedTime', datetime.now().isoformat()),
@@ -300,86 +650,47 @@ class GoogleDriveAdapter:
                 # Mock response for development
                 return await self._get_mock_document_content(doc_id)
                 
-        except HttpError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Google Drive API error fetching document {doc_id}: {e}")
-            if e.resp.status == 404:
-                raise Exception(f"Document {doc_id} not found")
-            elif e.resp.status == 403:
-                raise Exception(f"Access denied to document {doc_id}")
+            if e.response.status_code == 404:
+                raise Exception(f"Document {doc_id} not found") from e
+            elif e.response.status_code == 403:
+                raise Exception(f"Access denied to document {doc_id}") from e
             else:
-                raise Exception(f"Google Drive API error: {e}")
+                raise Exception(f"Google Drive API error: {e}") from e
         except Exception as e:
             logger.error(f"Error fetching Google Drive document {doc_id}: {e}")
             raise
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((HttpError, Exception))
-    )
-    async def get_recent_updates(self, days: int) -> List[RecentUpdate]:
+    @_drive_retry
+    async def get_recent_updates(self, days: int, max_results: int = 50) -> List[RecentUpdate]:
         """Get recent updates from Google Drive"""
         logger.info(f"Getting Google Drive updates from the last {days} days")
         
         try:
-            service = await self._get_service()
+            credentials = await self._get_credentials()
             
-            if not service and self.use_production_api:
+            if not credentials and self.use_production_api:
                 logger.error("Google Drive service not available")
                 return []
             
-            if service:
+            if credentials:
                 # Production API call
                 cutoff_date = datetime.now() - timedelta(days=days)
                 cutoff_date_str = cutoff_date.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
                 
                 query = f"modifiedTime >= '{cutoff_date_str}' and trashed=false"
                 
-                loop = asyncio.get_event_loop()
-                
-                def _get_updates():
-                    return service.files().list(
-                        q=query,
-                        fields="files(id,name,description,webViewLink,modifiedTime,owners,lastModifyingUser,createdTime)",
-                        orderBy="modifiedTime desc",
-                        pageSize=50
-                    ).execute()
-                
-                result = await loop.run_in_executor(None, _get_updates)
-                files = result.get('files', [])
+                pages = self._iter_file_pages(
+                    max_results,
+                    q=query,
+                    fields=_UPDATE_FIELDS,
+                    orderBy="modifiedTime desc"
+                )
                 
                 updates = []
-                for file in files:
-                    try:
-                        # Determine update type
-                        created_time = datetime.fromisoformat(file.get('createdTime', '').replace('Z', '+00:00'))
-                        modified_time = datetime.fromisoformat(file.get('modifiedTime', '').replace('Z', '+00:00'))
-                        
-                        update_type = "created" if (modified_time - created_time).total_seconds() < 60 else "modified"
-                        
-                        # Get modifier information
-                        last_modifying_user = file.get('lastModifyingUser', {})
-                        author = last_modifying_user.get('displayName', 'Unknown')
-                        
-                        # Generate snippet
-                        snippet = file.get('description', '')
-                        if not snippet:
-                            action = "Created" if update_type == "created" else "Modified"
-                            snippet = f"{action} document: {file.get('name', 'Untitled')}"
-                        
-                        updates.append(RecentUpdate(
-                            id=f"gdrive:{file['id']}",
-                            title=file.get('name', 'Untitled'),
-                            snippet=snippet[:200] + "..." if len(snippet) > 200 else snippet,
-                            url=file.get('webViewLink', ''),
-                            source=DocumentSource.gdrive,
-                            last_modified=file.get('modifiedTime', datetime.now().isoformat()),
-                            author=author,
-                            update_type=update_type
-                        ))
-                    except Exception as e:
-                        logger.warning(f"Error processing update: {e}")
-                        continue
+                async for files in pages:
+                    updates.extend(_convert_files(files, _file_to_recent_update))
                 
                 logger.info(f"Found {len(updates)} recent updates in Google Drive")
                 return updates
@@ -388,55 +699,35 @@ class GoogleDriveAdapter:
                 # Mock response for development
                 return await self._get_mock_recent_updates(days)
                 
-        except HttpError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"Google Drive API error getting updates: {e}")
-            if e.resp.status == 403:
-                raise Exception("Google Drive API quota exceeded or access denied")
+            if e.response.status_code == 403:
+                raise Exception("Google Drive API quota exceeded or access denied") from e
             else:
-                raise Exception(f"Google Drive API error: {e}")
+                raise Exception(f"Google Drive API error: {e}") from e
         except Exception as e:
             logger.error(f"Error getting Google Drive updates: {e}")
-            raise Exception(f"Failed to get recent updates from Google Drive: {e}")
+            raise Exception(f"Failed to get recent updates from Google Drive: {e}") from e
     
     # Mock methods for development
     async def _get_mock_search_results(self, query: str, max_results: int) -> List[SearchResult]:
         """Mock search results for development"""
         logger.info(f"Returning mock Google Drive search results for: '{query}'")
         
-        mock_results = [
-            SearchResult(
-                id="gdrive:1BxY2zW3vU4sR5qP6oN7mL8kJ9hG",
-                title=f"Project Document - {query}",
-                snippet=f"This document contains comprehensive information about {query} including project details, timelines, and deliverables. Last updated with new requirements and scope changes.",
-                url="https://docs.google.com/document/d/1BxY2zW3vU4sR5qP6oN7mL8kJ9hG/edit",
-                source=DocumentSource.gdrive,
-                last_modified=datetime.now().isoformat(),
-                author="John Smith",
-                access_level="editor"
-            ),
-            SearchResult(
-                id="gdrive:2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG",
-                title=f"Meeting Notes - {query} Discussion",
-                snippet=f"Detailed notes from the {query} meeting held last week. Includes action items, decisions made, and follow-up tasks assigned to team members.",
-                url="https://docs.google.com/document/d/2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG/edit",
-                source=DocumentSource.gdrive,
-                last_modified=(datetime.now() - timedelta(days=2)).isoformat(),
-                author="Sarah Johnson",
-                access_level="viewer"
-            ),
+        now = datetime.now()
+        return [
             SearchResult(
-                id="gdrive:3DzA4yX5wV6tS7rQ8pO9nM0lK1iH",
-                title=f"{query} Presentation",
-                snippet=f"Slide deck for the {query} presentation to stakeholders. Contains charts, graphs, and key metrics showing project progress and outcomes.",
-                url="https://docs.google.com/presentation/d/3DzA4yX5wV6tS7rQ8pO9nM0lK1iH/edit",
+                id=template["id"],
+                title=template["title"].format(query=query),
+                snippet=template["snippet"].format(query=query),
+                url=template["url"],
                 source=DocumentSource.gdrive,
-                last_modified=(datetime.now() - timedelta(hours=6)).isoformat(),
-                author="Mike Chen",
-                access_level="editor"
+                last_modified=(now - template["age"]).isoformat(),
+                author=template["author"],
+                access_level=template["access_level"]
             )
+            for template in _MOCK_SEARCH_TEMPLATES[:max_results]
         ]
-        
-        return mock_results[:max_results]
     
     async def _get_mock_document_content(self, doc_id: str) -> DocumentContent:
         """Mock document content for development"""
@@ -445,41 +736,7 @@ class GoogleDriveAdapter:
         return DocumentContent(
             id=f"gdrive:{doc_id}",
             title="Project Proposal Document",
-            content="""# Project Proposal: Workplace Search Enhancement
-
-## Executive Summary
-This document outlines the comprehensive plan for enhancing our workplace search capabilities by integrating multiple document sources including Google Drive, Notion, Slack, and Confluence.
-
-## Project Objectives
-1. Improve document discoverability across platforms
-2. Reduce time spent searching for information
-3. Enhance team collaboration and knowledge sharing
-4. Implement secure, role-based access controls
-
-## Technical Architecture
-The solution will implement a Model Context Protocol (MCP) server that provides unified search capabilities across:
-- Google Drive documents and files
-- Notion pages and databases
-- Slack messages and files
-- Confluence spaces and pages
-
-## Implementation Timeline
-- Phase 1: Core MCP server development (4 weeks)
-- Phase 2: Google Drive integration (2 weeks)
-- Phase 3: Additional source integrations (6 weeks)
-- Phase 4: Testing and deployment (2 weeks)
-
-## Resource Requirements
-- 2 Senior developers
-- 1 DevOps engineer
-- 1 Product manager
-- Cloud infrastructure costs: $500/month
-
-## Expected Outcomes
-- 60% reduction in document search time
-- Improved team productivity
-- Better knowledge management
-- Enhanced security and compliance""",
+            content=_MOCK_DOCUMENT_CONTENT,
             source=DocumentSource.gdrive,
             url=f"https://docs.google.com/document/d/{doc_id}/edit",
             last_modified=datetime.now().isoformat(),
@@ -490,47 +747,30 @@ The solution will implement a Model Context Protocol (MCP) server that provides
         """Mock recent updates for development"""
         logger.info(f"Returning mock Google Drive recent updates for last {days} days")
         
-        base_time = datetime.now()
+        now = datetime.now()
+        window = timedelta(days=days)
         
-        mock_updates = [
-            RecentUpdate(
-                id="gdrive:1BxY2zW3vU4sR5qP6oN7mL8kJ9hG",
-                title="Q4 Budget Planning",
-                snippet="Updated quarterly budget allocations and revised spending projections based on current market conditions.",
-                url="https://docs.google.com/spreadsheets/d/1BxY2zW3vU4sR5qP6oN7mL8kJ9hG/edit",
-                source=DocumentSource.gdrive,
-                last_modified=(base_time - timedelta(hours=2)).isoformat(),
-                author="Finance Team",
-                update_type="modified"
-            ),
-            RecentUpdate(
-                id="gdrive:2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG",
-                title="Team Performance Review Template",
-                snippet="Created new template for annual performance reviews with updated criteria and evaluation metrics.",
-                url="https://docs.google.com/document/d/2CyZ3xW4vU5sR6qP7oN8mL9kJ0hG/edit",
-                source=DocumentSource.gdrive,
-                last_modified=(base_time - timedelta(days=1)).isoformat(),
-                author="HR Department",
-                update_type="created"
-            ),
+        # Only build updates that fall inside the requested window
+        return [
             RecentUpdate(
-                id="gdrive:3DzA4yX5wV6tS7rQ8pO9nM0lK1iH",
-                title="Project Timeline Update",
-                snippet="Revised project milestones and deliverable dates to accommodate new requirements and resource constraints.",
-                url="https://docs.google.com/document/d/3DzA4yX5wV6tS7rQ8pO9nM0lK1iH/edit",
+                id=template["id"],
+                title=template["title"],
+                snippet=template["snippet"],
+                url=template["url"],
                 source=DocumentSource.gdrive,
-                last_modified=(base_time - timedelta(days=2, hours=5)).isoformat(),
-                author="Project Manager",
-                update_type="modified"
+                last_modified=(now - template["age"]).isoformat(),
+                author=template["author"],
+                update_type=template["update_type"]
             )
+            for template in _MOCK_RECENT_UPDATE_TEMPLATES
+            if template["age"] < window
         ]
-        
-        # Filter based on days parameter
-        cutoff_date = base_time - timedelta(days=days)
-        return [
-            update for update in mock_updates 
-            if datetime.fromisoformat(update.last_modified.replace('Z', '+00:00')) > cutoff_date
-        ]
+
+
+def _write_token(token_path: str, token_json: str):
+    """Write the OAuth token file; run in a thread from async code"""
+    with open(token_path, 'w') as token_file:
+        token_file.write(token_json)
 
 
 # OAuth Setup Utility
@@ -558,10 +798,17 @@ https://developers.google.com/drive/api/quickstart/python
     
     oauth_handler = GoogleDriveOAuthHandler(credentials_path)
     
-    try:
-        # Start OAuth flow
+    def _load_flow():
+        from google_auth_oauthlib.flow import Flow
+        
         flow = Flow.from_client_secrets_file(credentials_path, oauth_handler.scopes)
         flow.redirect_uri = 'http://localhost:8080'
+        return flow
+    
+    try:
+        # Start OAuth flow; importing the OAuth library and parsing the
+        # client secrets is blocking, so do it in a thread
+        flow = await asyncio.to_thread(_load_flow)
         
         auth_url, _ = flow.authorization_url(prompt='consent')
         
@@ -576,14 +823,14 @@ OAuth Setup:
 4. Paste it here:
         """)
         
-        auth_code = input("Authorization code: ").strip()
+        # Keep the event loop free while waiting on the user and the token endpoint
+        auth_code = (await asyncio.to_thread(input, "Authorization code: ")).strip()
         
         # Exchange authorization code for credentials
-        flow.fetch_token(code=auth_code)
+        await asyncio.to_thread(flow.fetch_token, code=auth_code)
         
         # Save credentials
-        with open(oauth_handler.token_path, 'w') as token_file:
-            token_file.write(flow.credentials.to_json())
+        await asyncio.to_thread(_write_token, oauth_handler.token_path, flow.credentials.to_json())
         
         print(f"✅ Google Drive OAuth setup complete! Credentials saved to {oauth_handler.token_path}")
         return True
@@ -2,13 +2,14 @@
 Authentication module for Google Drive MCP Server
 """
 
-from app.auth.descope_auth import DescopeAuthenticator
-from app.auth.cequence_gateway import CequenceGateway
+from app.auth.descope_auth import DescopeAuthenticator, authenticator
+from app.auth.cequence_gateway import CequenceGateway, get_gateway
 from app.auth.security import SecurityMiddleware
 
 __all__ = [
     "DescopeAuthenticator",
     "authenticator",
     "CequenceGateway",
+    "get_gateway",
     "SecurityMiddleware"
 ]
@@ -3,20 +3,195 @@ Cequence AI Gateway integration for enhanced security
 """
 
 import os
+import re
 import json
+import time
+import uuid
+import secrets
+import array
 import asyncio
+import functools
+import gzip
+import hashlib
 from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from datetime import datetime
+from dataclasses import asdict, dataclass
+from urllib.parse import unquote_plus
 
 import httpx
+from cachetools import TLRUCache, TTLCache
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
 from fastapi import Request, HTTPException, status
 from pydantic import BaseModel
 
 from ..utils.logger import logger
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-@dataclass
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    def _json_default(obj: Any) -> Any:
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return asdict(obj)
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_json_default).encode()
+    _json_loads = json.loads
+
+
+# Background delivery of security events
+_EVENT_QUEUE_SIZE = 10_000
+_EVENT_CONSUMERS = 4
+_EVENT_BATCH_SIZE = 100
+_EVENT_FLUSH_INTERVAL = 0.5
+
+# Background delivery of request analytics
+_ANALYTICS_QUEUE_SIZE = 10_000
+_ANALYTICS_BATCH_SIZE = 64
+_ANALYTICS_FLUSH_INTERVAL = 0.1
+
+# Idempotent methods whose concurrent analyses can share one Cequence call
+_COALESCED_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Request headers forwarded to Cequence for analysis; Starlette lowercases names
+_TRACKED_HEADERS = frozenset({
+    "user-agent",
+    "referer",
+    "accept",
+    "accept-language",
+    "content-type",
+    "origin",
+    "host",
+    "x-forwarded-for",
+    "x-real-ip",
+})
+
+# Slots in the in-process rate-limit tables (a power of two)
+_RATE_LIMIT_SLOTS = 65536
+_RATE_LIMIT_SLOT_MASK = _RATE_LIMIT_SLOTS - 1
+
+# How long an IP stays blocked after Cequence flags it
+_DEFAULT_BLOCK_SECONDS = 24 * 3600
+
+# Substrings that identify obvious attacks without a Cequence round-trip,
+# matched against the lowercased user agent, path and decoded query string.
+# Indicators never match as part of a longer word (see _at_word_boundaries).
+# Only "high" indicators block locally; the rest are left to Cequence.
+_THREAT_INDICATORS = {
+    # SQL injection
+    "union select": "high",
+    "union all select": "high",
+    "' or '1'='1": "high",
+    "' or 1=1": "high",
+    "; drop table": "high",
+    "information_schema": "high",
+    "sleep(": "medium",
+    # Path traversal and sensitive files
+    "../": "high",
+    "..\\": "high",
+    "%2e%2e": "high",
+    "/etc/passwd": "high",
+    "/.env": "high",
+    "/.git/": "high",
+    # Script injection
+    "<script": "high",
+    "javascript:": "medium",
+    # Scanner user agents
+    "sqlmap": "high",
+    "nikto": "high",
+    "nmap": "high",
+    "masscan": "high",
+    "acunetix": "high",
+    "nessus": "high",
+    "wpscan": "high",
+    "dirbuster": "high",
+    "gobuster": "high",
+}
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _at_word_boundaries(text: str, start: int, end: int) -> bool:
+    """Check that a match does not start or end inside a longer word.
+
+    Only edges that are themselves word characters are checked, so "nmap"
+    matches "nmap/7.9" but not "unmapped", while "../" matches anywhere.
+    """
+    if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+        return False
+    if _is_word_char(text[end - 1]) and end < len(text) and _is_word_char(text[end]):
+        return False
+    return True
+
+
+def _build_indicator_matcher():
+    """Compile the threat indicators into a single multi-pattern matcher"""
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for indicator, severity in _THREAT_INDICATORS.items():
+            automaton.add_word(indicator, (indicator, severity))
+        automaton.make_automaton()
+        return lambda text: [
+            match for last, match in automaton.iter(text)
+            if _at_word_boundaries(text, last - len(match[0]) + 1, last + 1)
+        ]
+    
+    # Fall back to one alternation regex when pyahocorasick isn't installed,
+    # with lookarounds on word-character edges for the same boundary rule
+    def _bounded(indicator: str) -> str:
+        head = r"(?<!\w)" if _is_word_char(indicator[0]) else ""
+        tail = r"(?!\w)" if _is_word_char(indicator[-1]) else ""
+        return head + re.escape(indicator) + tail
+    
+    pattern = re.compile("|".join(map(_bounded, _THREAT_INDICATORS)))
+    return lambda text: [
+        (match.group(0), _THREAT_INDICATORS[match.group(0)])
+        for match in pattern.finditer(text)
+    ]
+
+
+# Token bucket covering both the per-minute and per-hour limits in one atomic
+# round-trip. Returns the remaining minute tokens, -1 when the minute bucket
+# is empty or -2 when the hour bucket is empty.
+_TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local minute_cap = tonumber(ARGV[2])
+local hour_cap = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', KEYS[1], 'm', 'h', 'ts')
+local minute_tokens = tonumber(state[1]) or minute_cap
+local hour_tokens = tonumber(state[2]) or hour_cap
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+
+minute_tokens = math.min(minute_cap, minute_tokens + elapsed * minute_cap / 60000)
+hour_tokens = math.min(hour_cap, hour_tokens + elapsed * hour_cap / 3600000)
+
+local result
+if minute_tokens < 1 then
+    result = -1
+elseif hour_tokens < 1 then
+    result = -2
+else
+    minute_tokens = minute_tokens - 1
+    hour_tokens = hour_tokens - 1
+    result = math.floor(minute_tokens)
+end
+
+redis.call('HSET', KEYS[1], 'm', minute_tokens, 'h', hour_tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 3600000)
+return result
+"""
+
+
+@dataclass(frozen=True, slots=True)
 class SecurityEvent:
     """Security event from Cequence"""
     event_id: str
@@ -43,21 +218,126 @@ class CequenceConfig(BaseModel):
     analytics_enabled: bool = True
 
 
+def _bump_window(counters: array.array, slot: int, window: int) -> int:
+    """Increment a packed window counter, restarting it when the window changed"""
+    packed = counters[slot]
+    count = (packed >> 32) + 1 if packed & 0xFFFFFFFF == window else 1
+    counters[slot] = (count << 32) | window
+    return count
+
+
+@functools.lru_cache(maxsize=1024)
+def _first_forwarded_ip(forwarded_for: str) -> str:
+    """Return the originating client from an X-Forwarded-For chain"""
+    return forwarded_for.split(",")[0].strip()
+
+
+def get_client_ip(request: Request) -> str:
+    """Extract client IP from request, memoized on the request state"""
+    client_ip = getattr(request.state, "client_ip", None)
+    if client_ip is not None:
+        return client_ip
+    
+    # Check for forwarded headers first
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        client_ip = _first_forwarded_ip(forwarded_for)
+    else:
+        client_ip = request.headers.get("x-real-ip")
+        if not client_ip:
+            # Fallback to direct client IP
+            client_ip = request.client.host if request.client else "unknown"
+    
+    request.state.client_ip = client_ip
+    return client_ip
+
+
 class CequenceGateway:
     """Cequence AI Gateway integration for API security"""
     
     def __init__(self):
         self.config = self._load_config()
         self.client = None
-        self.blocked_ips = set()
-        self.suspicious_ips = set()
-        self.rate_limits = {}
+        # Bounded, self-expiring IP state; blocked entries map to their
+        # expiry time so each block can carry its own duration
+        self.blocked_ips = TLRUCache(
+            maxsize=100_000,
+            ttu=lambda _ip, expires_at, _now: expires_at,
+            timer=time.time
+        )
+        self.suspicious_ips = TTLCache(maxsize=100_000, ttl=3600)
+        # In-process fallback limiter: one packed (count << 32 | window) word
+        # per hashed IP slot for each of the minute and hour windows
+        self.rate_limits = array.array("Q", bytes(8 * _RATE_LIMIT_SLOTS))
+        self.hourly_rate_limits = array.array("Q", bytes(8 * _RATE_LIMIT_SLOTS))
         
-        if self.config.enabled:
-            self._initialize_client()
-        else:
+        # Recent low-risk verdicts, so repeat hits skip the Cequence round-trip
+        self._verdict_cache = TTLCache(maxsize=50_000, ttl=30)
+        
+        # Security events are shipped in batches by background consumers
+        self._event_queue: Optional[asyncio.Queue] = None
+        self._event_consumers: List[asyncio.Task] = []
+        self.dropped_events = 0
+        
+        # Analytics records are likewise shipped in batches off the request path
+        self._analytics_queue: Optional[asyncio.Queue] = None
+        self._analytics_flusher: Optional[asyncio.Task] = None
+        self.dropped_analytics = 0
+        
+        self.local_matcher = _build_indicator_matcher()
+        
+        # In-flight analyses of idempotent requests, keyed by (ip, method, path)
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        
+        self.per_minute_limit = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+        self.per_hour_limit = int(os.getenv("RATE_LIMIT_PER_HOUR", "1000"))
+        self.max_concurrent_requests = int(os.getenv("MAX_CONCURRENT_REQUESTS_PER_IP", "50"))
+        self._active_requests: Dict[str, int] = {}
+        
+        # Shared rate limiting across workers when Redis is configured;
+        # otherwise limits are tracked in-process
+        self.redis = None
+        self._rate_limit_script = None
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            self.redis = aioredis.from_url(redis_url)
+            self._rate_limit_script = self.redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        
+        if not self.config.enabled:
             logger.warning("Cequence AI Gateway disabled")
     
+    async def startup(self):
+        """Create the HTTP client; called from the application lifespan"""
+        # Every request awaits the gateway, so a stdlib loop is worth flagging
+        loop_type = type(asyncio.get_running_loop())
+        if loop_type.__module__.startswith("uvloop"):
+            logger.info(f"Cequence gateway running on {loop_type.__module__}.{loop_type.__name__}")
+        else:
+            logger.warning(
+                f"Cequence gateway running on {loop_type.__module__}.{loop_type.__name__}; "
+                "start uvicorn with --loop uvloop for better throughput"
+            )
+        
+        if self.config.enabled and self.client is None:
+            self._initialize_client()
+        
+        if self.client and self.config.analytics_enabled and not self._event_consumers:
+            self._event_queue = asyncio.Queue(maxsize=_EVENT_QUEUE_SIZE)
+            self._event_consumers = [
+                asyncio.create_task(self._consume_batches(
+                    self._event_queue, _EVENT_BATCH_SIZE, _EVENT_FLUSH_INTERVAL,
+                    self.log_security_events_batch
+                ))
+                for _ in range(_EVENT_CONSUMERS)
+            ]
+        
+        if self.client and self.config.analytics_enabled and self._analytics_flusher is None:
+            self._analytics_queue = asyncio.Queue(maxsize=_ANALYTICS_QUEUE_SIZE)
+            self._analytics_flusher = asyncio.create_task(self._consume_batches(
+                self._analytics_queue, _ANALYTICS_BATCH_SIZE, _ANALYTICS_FLUSH_INTERVAL,
+                self.log_analytics_batch
+            ))
+    
     def _load_config(self) -> CequenceConfig:
         """Load Cequence configuration from environment"""
         return CequenceConfig(
@@ -85,10 +365,26 @@ class CequenceGateway:
             "X-Tenant-ID": self.config.tenant_id
         }
         
+        # An explicit transport makes httpx ignore the client's http2 and limits,
+        # so the pool settings belong on the transport itself
         self.client = httpx.AsyncClient(
             base_url=self.config.api_endpoint,
             headers=headers,
-            timeout=self.config.timeout
+            timeout=httpx.Timeout(
+                connect=2.0,
+                read=self.config.timeout,
+                write=2.0,
+                pool=1.0
+            ),
+            transport=httpx.AsyncHTTPTransport(
+                retries=0,
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=100,
+                    max_connections=1000,
+                    keepalive_expiry=75
+                )
+            )
         )
         
         logger.info("Cequence AI Gateway client initialized")
@@ -111,8 +407,53 @@ class CequenceGateway:
         
         # Rate limiting check
         if self.config.rate_limit_enabled:
-            await self._check_rate_limit(client_ip, request.url.path)
+            await self._check_rate_limit(client_ip, time.time())
+        
+        # Block obvious attacks locally before spending a Cequence call
+        self._screen_locally(request, client_ip, user_agent)
+        
+        # Reuse a recent verdict for the same client, endpoint and query;
+        # requests with sizeable bodies are always analyzed
+        query_digest = hashlib.blake2b(request.url.query.encode(), digest_size=16).digest()
+        request_key = (client_ip, request.method, request.url.path, query_digest)
+        cache_key = None
+        content_length = request.headers.get("content-length", 0)
+        if int(content_length or 0) <= 1024:
+            cache_key = request_key
+            cached = self._verdict_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
+        # Concurrent identical idempotent requests share one analysis
+        if request.method not in _COALESCED_METHODS:
+            return await self._analyze_remotely(request, client_ip, user_agent, content_length, cache_key)
+        
+        task = self._inflight.get(request_key)
+        if task is None:
+            task = asyncio.create_task(
+                self._analyze_remotely(request, client_ip, user_agent, content_length, cache_key)
+            )
+            self._inflight[request_key] = task
+            task.add_done_callback(functools.partial(self._forget_inflight, request_key))
+        # Shielded, so a cancelled caller never aborts the analysis for the others
+        return await asyncio.shield(task)
+    
+    def _forget_inflight(self, key: tuple, task: asyncio.Task):
+        """Drop a finished analysis, marking its exception retrieved in case no caller is left"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+    
+    async def _analyze_remotely(
+        self,
+        request: Request,
+        client_ip: str,
+        user_agent: str,
+        content_length: Any,
+        cache_key: Optional[tuple]
+    ) -> Dict[str, Any]:
+        """Send the request to Cequence and turn the result into a verdict"""
         # Prepare request data for analysis
         request_data = {
             "timestamp": datetime.utcnow().isoformat(),
@@ -121,8 +462,11 @@ class CequenceGateway:
             "method": request.method,
             "path": str(request.url.path),
             "query_params": dict(request.query_params),
-            "headers": dict(request.headers),
-            "content_length": request.headers.get("content-length", 0)
+            "headers": {
+                name: value for name, value in request.headers.items()
+                if name in _TRACKED_HEADERS
+            },
+            "content_length": content_length
         }
         
         try:
@@ -131,7 +475,7 @@ class CequenceGateway:
             
             # Process analysis result
             if analysis_result.get("blocked", False):
-                self.blocked_ips.add(client_ip)
+                self.blocked_ips[client_ip] = time.time() + _DEFAULT_BLOCK_SECONDS
                 logger.warning(f"Cequence blocked IP: {client_ip}")
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -140,15 +484,18 @@ class CequenceGateway:
             
             risk_score = analysis_result.get("risk_score", 0.0)
             if risk_score > 0.7:
-                self.suspicious_ips.add(client_ip)
+                self.suspicious_ips[client_ip] = risk_score
                 logger.warning(f"High risk IP detected: {client_ip} (score: {risk_score})")
             
-            return {
+            verdict = {
                 "allowed": True,
                 "risk_score": risk_score,
                 "recommendations": analysis_result.get("recommendations", []),
                 "threat_indicators": analysis_result.get("threat_indicators", [])
             }
+            if cache_key is not None and risk_score < 0.5:
+                self._verdict_cache[cache_key] = verdict
+            return verdict
             
         except HTTPException:
             raise
@@ -157,20 +504,40 @@ class CequenceGateway:
             # Fail open - allow request if analysis fails
             return {"allowed": True, "risk_score": 0.0, "error": str(e)}
     
+    def _screen_locally(self, request: Request, client_ip: str, user_agent: str):
+        """Reject requests that match a high-severity local threat indicator"""
+        text = f"{user_agent} {request.url.path} {unquote_plus(request.url.query)}".lower()
+        high = [indicator for indicator, severity in self.local_matcher(text) if severity == "high"]
+        if not high:
+            return
+        
+        logger.warning(f"Local threat indicators from IP {client_ip}: {', '.join(high)}")
+        self.enqueue_security_event(SecurityEvent(
+            event_id=uuid.uuid4().hex,
+            timestamp=datetime.utcnow(),
+            event_type="local_threat_match",
+            severity="high",
+            source_ip=client_ip,
+            user_agent=user_agent,
+            description=f"Matched local threat indicators: {', '.join(high)}",
+            risk_score=1.0,
+            recommended_action="block"
+        ))
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied - security threat detected"
+        )
+    
     async def _send_for_analysis(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Send request data to Cequence for analysis"""
         if not self.client:
             return {"allowed": True, "risk_score": 0.0}
         
         try:
-            response = await self.client.post(
-                "/api/v1/analyze",
-                json=request_data,
-                timeout=self.config.timeout
-            )
+            response = await self._post_json("/api/v1/analyze", request_data)
             
             if response.status_code == 200:
-                return response.json()
+                return _json_loads(response.content)
             else:
                 logger.error(f"Cequence API error: {response.status_code}")
                 return {"allowed": True, "risk_score": 0.0}
@@ -182,122 +549,246 @@ class CequenceGateway:
             logger.error(f"Cequence API request failed: {e}")
             return {"allowed": True, "risk_score": 0.0}
     
-    async def _check_rate_limit(self, client_ip: str, path: str):
+    async def _post_json(self, path: str, payload: Any) -> httpx.Response:
+        """POST a JSON payload; the client already sends the JSON content type"""
+        return await self.client.post(path, content=_json_dumps(payload))
+    
+    async def _check_rate_limit(self, client_ip: str, now_ts: float):
         """Check rate limiting for client IP"""
-        now = datetime.utcnow()
-        minute_key = f"{client_ip}:{now.strftime('%Y-%m-%d-%H-%M')}"
-        hour_key = f"{client_ip}:{now.strftime('%Y-%m-%d-%H')}"
+        per_minute_limit = self.per_minute_limit
+        per_hour_limit = self.per_hour_limit
+        
+        if self._rate_limit_script is None:
+            await self._check_local_rate_limit(client_ip, now_ts)
+            return
+        
+        try:
+            remaining = await self._rate_limit_script(
+                keys=[f"rl:{client_ip}"],
+                args=[int(now_ts * 1000), per_minute_limit, per_hour_limit]
+            )
+        except RedisError as e:
+            logger.error(f"Redis rate limiting failed, falling back to in-process limits: {e}")
+            await self._check_local_rate_limit(client_ip, now_ts)
+            return
         
-        # Get rate limits from environment
-        per_minute_limit = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
-        per_hour_limit = int(os.getenv("RATE_LIMIT_PER_HOUR", "1000"))
+        if remaining == -1:
+            logger.warning(f"Rate limit exceeded for IP {client_ip}: over {per_minute_limit}/min")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded - too many requests per minute"
+            )
+        if remaining == -2:
+            logger.warning(f"Hourly rate limit exceeded for IP {client_ip}: over {per_hour_limit}/hour")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded - too many requests per hour"
+            )
+    
+    async def _check_local_rate_limit(self, client_ip: str, now_ts: float):
+        """Check rate limiting for client IP using in-process counters"""
+        per_minute_limit = self.per_minute_limit
+        per_hour_limit = self.per_hour_limit
+        bucket_minute = int(now_ts) // 60
+        bucket_hour = bucket_minute // 60
+        # Colliding IPs share a counter, which only tightens their limit
+        slot = hash(client_ip) & _RATE_LIMIT_SLOT_MASK
         
         # Check minute limit
-        if minute_key not in self.rate_limits:
-            self.rate_limits[minute_key] = 0
-        self.rate_limits[minute_key] += 1
+        minute_count = _bump_window(self.rate_limits, slot, bucket_minute)
         
-        if self.rate_limits[minute_key] > per_minute_limit:
-            logger.warning(f"Rate limit exceeded for IP {client_ip}: {self.rate_limits[minute_key]}/min")
+        if minute_count > per_minute_limit:
+            logger.warning(f"Rate limit exceeded for IP {client_ip}: {minute_count}/min")
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Rate limit exceeded - too many requests per minute"
             )
         
         # Check hour limit
-        if hour_key not in self.rate_limits:
-            self.rate_limits[hour_key] = 0
-        self.rate_limits[hour_key] += 1
+        hour_count = _bump_window(self.hourly_rate_limits, slot, bucket_hour)
         
-        if self.rate_limits[hour_key] > per_hour_limit:
-            logger.warning(f"Hourly rate limit exceeded for IP {client_ip}: {self.rate_limits[hour_key]}/hour")
+        if hour_count > per_hour_limit:
+            logger.warning(f"Hourly rate limit exceeded for IP {client_ip}: {hour_count}/hour")
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="Rate limit exceeded - too many requests per hour"
             )
-        
-        # Clean old rate limit entries
-        await self._cleanup_rate_limits()
     
-    async def _cleanup_rate_limits(self):
-        """Clean up old rate limit entries"""
-        now = datetime.utcnow()
-        cutoff_minute = (now - timedelta(minutes=1)).strftime('%Y-%m-%d-%H-%M')
-        cutoff_hour = (now - timedelta(hours=1)).strftime('%Y-%m-%d-%H')
-        
-        # Remove old entries
-        keys_to_remove = []
-        for key in self.rate_limits:
-            if ':' in key:
-                _, timestamp = key.rsplit(':', 1)
-                if len(timestamp) == 13:  # minute format
-                    if timestamp < cutoff_minute:
-                        keys_to_remove.append(key)
-                elif len(timestamp) == 10:  # hour format
-                    if timestamp < cutoff_hour:
-                        keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.rate_limits[key]
+    async def charge_rate_limit(self, request: Request, count: int):
+        """Count extra units of work from one request against the client's rate limits"""
+        if not (self.config.enabled and self.config.threat_detection_enabled and self.config.rate_limit_enabled):
+            return
+        
+        client_ip = self._get_client_ip(request)
+        now_ts = time.time()
+        for _ in range(count):
+            await self._check_rate_limit(client_ip, now_ts)
     
     def _get_client_ip(self, request: Request) -> str:
         """Extract client IP from request"""
-        # Check for forwarded headers first
-        forwarded_for = request.headers.get("x-forwarded-for")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        
-        real_ip = request.headers.get("x-real-ip")
-        if real_ip:
-            return real_ip
+        return get_client_ip(request)
+    
+    async def acquire_request_slot(self, client_ip: str) -> Optional[str]:
+        """Reserve one of the client's concurrent request slots"""
+        if self.redis is not None:
+            slot = secrets.token_hex(4)
+            key = f"inflight:{client_ip}"
+            now_ms = int(time.time() * 1000)
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    # Slots older than a minute belong to requests that never released them
+                    pipe.zremrangebyscore(key, 0, now_ms - 60_000)
+                    pipe.zadd(key, {slot: now_ms})
+                    pipe.zcard(key)
+                    pipe.expire(key, 300)
+                    _, _, active, _ = await pipe.execute()
+                
+                if active > self.max_concurrent_requests:
+                    await self.redis.zrem(key, slot)
+                    self._reject_concurrent(client_ip, active)
+                return slot
+            except RedisError as e:
+                logger.error(f"Redis concurrency limiting failed, falling back to in-process limits: {e}")
         
-        # Fallback to direct client IP
-        if hasattr(request, "client") and request.client:
-            return request.client.host
+        active = self._active_requests.get(client_ip, 0) + 1
+        if active > self.max_concurrent_requests:
+            self._reject_concurrent(client_ip, active)
+        self._active_requests[client_ip] = active
+        return None
+    
+    async def release_request_slot(self, client_ip: str, slot: Optional[str]):
+        """Release a slot taken by acquire_request_slot"""
+        if slot is not None:
+            try:
+                await self.redis.zrem(f"inflight:{client_ip}", slot)
+            except RedisError as e:
+                logger.error(f"Failed to release concurrent request slot: {e}")
+            return
         
-        return "unknown"
+        active = self._active_requests.get(client_ip, 0) - 1
+        if active > 0:
+            self._active_requests[client_ip] = active
+        else:
+            self._active_requests.pop(client_ip, None)
+    
+    def _reject_concurrent(self, client_ip: str, active: int):
+        """Raise a 429 for a client over its concurrent request cap"""
+        logger.warning(f"Concurrent request limit exceeded for IP {client_ip}: {active} in flight")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded - too many concurrent requests"
+        )
     
     async def log_security_event(self, event: SecurityEvent):
         """Log security event to Cequence"""
         if not self.config.enabled or not self.config.analytics_enabled:
             return
         
-        event_data = {
-            "event_id": event.event_id,
-            "timestamp": event.timestamp.isoformat(),
-            "event_type": event.event_type,
-            "severity": event.severity,
-            "source_ip": event.source_ip,
-            "user_agent": event.user_agent,
-            "description": event.description,
-            "risk_score": event.risk_score,
-            "recommended_action": event.recommended_action
-        }
+        # Batched delivery once the background consumers are running
+        if self._event_queue is not None:
+            self.enqueue_security_event(event)
+            return
         
         try:
             if self.client:
-                await self.client.post("/api/v1/events", json=event_data)
+                await self._post_json("/api/v1/events", event)
                 logger.info(f"Logged security event: {event.event_id}")
         except Exception as e:
             logger.error(f"Failed to log security event: {e}")
     
+    def enqueue_security_event(self, event: SecurityEvent):
+        """Queue a security event for batched delivery without waiting on Cequence"""
+        if self._event_queue is None:
+            return
+        
+        try:
+            self._event_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+            logger.debug(f"Security event queue full, dropped {event.event_id}")
+    
+    async def log_security_events_batch(self, events: List[SecurityEvent]):
+        """Log a batch of security events to Cequence"""
+        if not events or not self.client:
+            return
+        
+        try:
+            # Event batches repeat the same keys, so even fast gzip shrinks them a lot
+            await self.client.post(
+                "/api/v1/events/batch",
+                content=gzip.compress(_json_dumps({"events": events}), compresslevel=1),
+                headers={"Content-Encoding": "gzip"}
+            )
+            logger.debug(f"Logged {len(events)} security events")
+        except Exception as e:
+            logger.error(f"Failed to log security event batch: {e}")
+    
+    async def _consume_batches(self, queue: asyncio.Queue, batch_size: int, flush_interval: float, ship):
+        """Drain a delivery queue and ship its items in batches"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            
+            # Collect until the batch is full or the flush interval elapses
+            deadline = loop.time() + flush_interval
+            while len(batch) < batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            await ship(batch)
+    
+    def enqueue_analytics(self, analytics_data: Dict[str, Any]):
+        """Queue analytics data for batched delivery without waiting on Cequence"""
+        if self._analytics_queue is None:
+            return
+        
+        analytics_data["timestamp"] = datetime.utcnow().isoformat()
+        analytics_data["tenant_id"] = self.config.tenant_id
+        try:
+            self._analytics_queue.put_nowait(analytics_data)
+        except asyncio.QueueFull:
+            self.dropped_analytics += 1
+            logger.debug("Analytics queue full, dropped record")
+    
+    async def log_analytics_batch(self, records: List[Dict[str, Any]]):
+        """Log a batch of analytics records to Cequence"""
+        if not records or not self.client:
+            return
+        
+        try:
+            response = await self._post_json("/api/v1/analytics/batch", {"records": records})
+            if response.status_code == 200:
+                logger.debug(f"Logged {len(records)} analytics records")
+            else:
+                logger.warning(f"Analytics batch logging failed with status: {response.status_code}")
+        except httpx.TimeoutException:
+            logger.warning("Cequence analytics timeout")
+        except Exception as e:
+            logger.error(f"Failed to log analytics batch: {e}")
+    
     async def log_analytics(self, analytics_data: Dict[str, Any]):
         """Log analytics data to Cequence"""
         if not self.config.enabled or not self.config.analytics_enabled:
             logger.debug("Cequence analytics disabled")
             return
         
+        # Batched delivery once the background flusher is running
+        if self._analytics_queue is not None:
+            self.enqueue_analytics(analytics_data)
+            return
+        
         try:
             # Enhance analytics data with timestamp
             analytics_data["timestamp"] = datetime.utcnow().isoformat()
             analytics_data["tenant_id"] = self.config.tenant_id
             
             if self.client:
-                response = await self.client.post(
-                    "/api/v1/analytics",
-                    json=analytics_data,
-                    timeout=self.config.timeout
-                )
+                response = await self._post_json("/api/v1/analytics", analytics_data)
                 
                 if response.status_code == 200:
                     logger.debug(f"Analytics logged successfully: {analytics_data.get('event_type', 'unknown')}")
@@ -319,7 +810,7 @@ class CequenceGateway:
         try:
             response = await self.client.get(f"/api/v1/threat-intel/{ip}")
             if response.status_code == 200:
-                return response.json()
+                return _json_loads(response.content)
         except Exception as e:
             logger.error(f"Failed to get threat intelligence: {e}")
         
@@ -327,7 +818,7 @@ class CequenceGateway:
     
     async def block_ip(self, ip: str, reason: str, duration_hours: int = 24):
         """Temporarily block an IP address"""
-        self.blocked_ips.add(ip)
+        self.blocked_ips[ip] = time.time() + duration_hours * 3600
         
         if self.config.enabled and self.client:
             try:
@@ -337,16 +828,43 @@ class CequenceGateway:
                     "duration_hours": duration_hours,
                     "timestamp": datetime.utcnow().isoformat()
                 }
-                await self.client.post("/api/v1/blocks", json=block_data)
+                await self._post_json("/api/v1/blocks", block_data)
                 logger.info(f"Blocked IP {ip} for {duration_hours} hours: {reason}")
             except Exception as e:
                 logger.error(f"Failed to register IP block: {e}")
     
     async def close(self):
-        """Close the HTTP client"""
+        """Close the HTTP and Redis clients"""
+        tasks = list(self._event_consumers)
+        if self._analytics_flusher is not None:
+            tasks.append(self._analytics_flusher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._event_consumers = []
+        self._analytics_flusher = None
+        
+        # Flush whatever was still queued before the client goes away
+        if self._event_queue is not None:
+            pending = []
+            while not self._event_queue.empty():
+                pending.append(self._event_queue.get_nowait())
+            self._event_queue = None
+            await self.log_security_events_batch(pending)
+        if self._analytics_queue is not None:
+            pending = []
+            while not self._analytics_queue.empty():
+                pending.append(self._analytics_queue.get_nowait())
+            self._analytics_queue = None
+            await self.log_analytics_batch(pending)
+        
         if self.client:
             await self.client.aclose()
+            self.client = None
+        if self.redis:
+            await self.redis.aclose()
 
 
-# Global gateway instance
-gateway = CequenceGateway()
+def get_gateway(request: Request) -> CequenceGateway:
+    """FastAPI dependency returning the gateway owned by the app lifespan"""
+    return request.app.state.gateway
@@ -3,10 +3,13 @@ Descope authentication integration for Google Drive MCP Server
 """
 
 import os
+import time
+import hashlib
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
+from cachetools import TLRUCache
 from descope import AuthException, DescopeClient
 from fastapi import HTTPException, status
 from pydantic import BaseModel
@@ -27,6 +30,23 @@ class DescopeUser(BaseModel):
     roles: list[str] = []
 
 
+# Verified tokens are reused for at most this long, and never past their JWT expiry
+_TOKEN_CACHE_TTL = 60
+
+# Permissions or roles that grant Google Drive access, read once at import
+_REQUIRED_PERMISSIONS = tuple(
+    p.strip() for p in os.getenv("REQUIRED_PERMISSIONS", "google-drive:read").split(",") if p.strip()
+)
+_REQUIRED_ROLES = tuple(
+    r.strip() for r in os.getenv("REQUIRED_ROLES", "").split(",") if r.strip()
+)
+
+
+def _token_cache_key(token: str) -> bytes:
+    """Fixed-size cache key for a token, so raw tokens are never stored as keys"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
 class DescopeAuthenticator:
     """Handles authentication using Descope"""
     
@@ -50,6 +70,13 @@ class DescopeAuthenticator:
                 logger.error(f"Failed to initialize Descope client: {e}")
                 self.enabled = False
                 self.client = None
+        
+        # Verified users by token digest; each entry is (user, expires_at)
+        self._token_cache = TLRUCache(
+            maxsize=10_000,
+            ttu=lambda _key, entry, _now: entry[1],
+            timer=time.time
+        )
     
     async def verify_token(self, token: str) -> Optional[DescopeUser]:
         """Verify a Descope JWT token and return user info"""
@@ -57,10 +84,14 @@ class DescopeAuthenticator:
             logger.warning("Descope not enabled - skipping token verification")
             return None
         
+        cache_key = _token_cache_key(token)
+        cached = self._token_cache.get(cache_key)
+        if cached is not None:
+            return cached[0]
+        
         try:
             # Verify the JWT token
             jwt_response = self.client.validate_session(token)
-            print(jwt_response)
             if not jwt_response:
                 logger.warning("Invalid Descope JWT token")
                 return None
@@ -79,6 +110,11 @@ class DescopeAuthenticator:
                 roles=claims.get("roles", [])
             )
             
+            now = time.time()
+            expires_at = min(now + _TOKEN_CACHE_TTL, claims.get("exp") or now + _TOKEN_CACHE_TTL)
+            if expires_at > now:
+                self._token_cache[cache_key] = (user, expires_at)
+            
             logger.info(f"Successfully verified Descope token for user: {user.email}")
             return user
             
@@ -101,15 +137,14 @@ class DescopeAuthenticator:
                 access_token=None
             )
         
-        # Extract Bearer token
-        if not authorization_header.startswith("Bearer "):
+        # Extract Bearer token; removeprefix hands back the same object when the prefix is missing
+        token = authorization_header.removeprefix("Bearer ")
+        if token is authorization_header:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authorization header format"
             )
         
-        token = authorization_header[7:]  # Remove "Bearer " prefix
-        
         # Verify token with Descope
         descope_user = await self.verify_token(token)
         
@@ -146,26 +181,9 @@ class DescopeAuthenticator:
     
     def _has_google_drive_permission(self, user: DescopeUser) -> bool:
         """Check if user has permission to access Google Drive"""
-        required_permissions = os.getenv("REQUIRED_PERMISSIONS", "google-drive:read").split(",")
-        required_roles = os.getenv("REQUIRED_ROLES", "").split(",")
-        
-        # Check permissions
-        if required_permissions and required_permissions != [""]:
-            for permission in required_permissions:
-                if permission.strip() in user.permissions:
-                    return True
-        
-        # Check roles
-        if required_roles and required_roles != [""]:
-            for role in required_roles:
-                if role.strip() in user.roles:
-                    return True
-        
-        # If no specific permissions/roles required, allow all verified users
-        if not required_permissions and not required_roles:
-            return user.verified_email
-        
-        return False
+        if any(permission in user.permissions for permission in _REQUIRED_PERMISSIONS):
+            return True
+        return any(role in user.roles for role in _REQUIRED_ROLES)
     
     async def generate_magic_link(self, email: str, redirect_url: str) -> Optional[str]:
         """Generate a magic link for passwordless authentication"""
@@ -258,7 +276,6 @@ class DescopeAuthenticator:
                 login_id=email,
                 password=password
             )
-            print(response)
             if response.get('sessionToken').get("email") != email:
                 raise AuthException("Authentication failed")
             
@@ -12,7 +12,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from .descope_auth import authenticator, DescopeUser
-from .cequence_gateway import gateway, SecurityEvent
+from .cequence_gateway import SecurityEvent, get_client_ip, get_gateway
 from ..models.models import UserContext
 from ..utils.logger import logger
 
@@ -22,11 +22,30 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     
     def __init__(self, app, skip_paths: Optional[list] = None):
         super().__init__(app)
-        self.skip_paths = skip_paths or [
+        self.skip_paths = frozenset(skip_paths or [
             "/health", "/docs", "/redoc", "/openapi.json", "/",
             "/auth/login", "/auth/signup", "/auth/callback", "/auth/user"
-        ]
+        ])
         self.bearer_scheme = HTTPBearer(auto_error=False)
+        
+        # Paths that don't require authentication
+        self._public_paths = frozenset([
+            "/health",
+            "/docs",
+            "/redoc",
+            "/openapi.json",
+            "/auth/login",
+            "/auth/signup",
+            "/auth/callback",
+            "/auth/user"
+        ])
+        
+        # Authentication is skipped when globally disabled for development
+        # or when Descope is not configured
+        self._auth_disabled = (
+            os.getenv("DISABLE_AUTH", "false").lower() == "true"
+            or not authenticator.enabled
+        )
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Process request through security pipeline"""
@@ -45,11 +64,17 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             # Add user context to request state
             request.state.user_context = user_context
             
-            # Process the request
-            response = await call_next(request)
+            # Step 3: Cap concurrent requests per client, then process the request
+            gateway = get_gateway(request)
+            client_ip = self._get_client_ip(request)
+            slot = await gateway.acquire_request_slot(client_ip)
+            try:
+                response = await call_next(request)
+            finally:
+                await gateway.release_request_slot(client_ip, slot)
             
-            # Log successful request
-            await self._log_successful_request(request, response, user_context)
+            # Queue the success event; delivery happens off the request path
+            self._log_successful_request(request, response, user_context)
             
             return response
             
@@ -72,7 +97,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     async def _analyze_with_cequence(self, request: Request):
         """Analyze request with Cequence AI Gateway"""
         try:
-            analysis_result = await gateway.analyze_request(request)
+            analysis_result = await get_gateway(request).analyze_request(request)
             
             # Store analysis results in request state
             request.state.security_analysis = analysis_result
@@ -133,35 +158,19 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     
     def _is_auth_required(self, path: str) -> bool:
         """Check if authentication is required for the given path"""
-        # Paths that don't require authentication
-        public_paths = [
-            "/health",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/auth/login",
-            "/auth/signup",
-            "/auth/callback",
-            "/auth/user"
-        ]
-        
-        # Check if authentication is globally disabled for development
-        if os.getenv("DISABLE_AUTH", "false").lower() == "true":
-            return False
-        
-        # If Descope is not configured, don't require auth
-        if not authenticator.enabled:
+        if self._auth_disabled:
             return False
         
-        return path not in public_paths
+        return path not in self._public_paths
     
-    async def _log_successful_request(self, request: Request, response: Response, user_context: UserContext):
+    def _log_successful_request(self, request: Request, response: Response, user_context: UserContext):
         """Log successful request for analytics"""
+        gateway = get_gateway(request)
         if gateway.config.analytics_enabled:
             try:
                 # Create a low-severity event for successful requests
                 event = SecurityEvent(
-                    event_id=str(uuid.uuid4()),
+                    event_id=uuid.uuid4().hex,
                     timestamp=datetime.utcnow(),
                     event_type="successful_request",
                     severity="info",
@@ -172,7 +181,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                     recommended_action="none"
                 )
                 
-                await gateway.log_security_event(event)
+                gateway.enqueue_security_event(event)
                 
             except Exception as e:
                 logger.error(f"Failed to log successful request: {e}")
@@ -189,7 +198,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             
             # Create security event
             event = SecurityEvent(
-                event_id=str(uuid.uuid4()),
+                event_id=uuid.uuid4().hex,
                 timestamp=datetime.utcnow(),
                 event_type="security_violation",
                 severity=severity,
@@ -200,7 +209,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 recommended_action="monitor" if severity == "low" else "investigate"
             )
             
-            await gateway.log_security_event(event)
+            await get_gateway(request).log_security_event(event)
             
             # Auto-block IPs with repeated violations
             if exception.status_code == 403:
@@ -225,20 +234,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     
     def _get_client_ip(self, request: Request) -> str:
         """Extract client IP from request"""
-        # Check for forwarded headers first
-        forwarded_for = request.headers.get("x-forwarded-for")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        
-        real_ip = request.headers.get("x-real-ip")
-        if real_ip:
-            return real_ip
-        
-        # Fallback to direct client IP
-        if hasattr(request, "client") and request.client:
-            return request.client.host
-        
-        return "unknown"
+        return get_client_ip(request)
 
 
 def get_current_user(request: Request) -> UserContext:
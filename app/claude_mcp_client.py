@@ -5,20 +5,222 @@ Connects Claude Desktop to the remote Workplace Search MCP Server
 
 import os
 import json
+import time
 import asyncio
 import httpx
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
 from typing import Any, Dict, List, Optional
-from datetime import datetime
 
+from jsonschema import Draft202012Validator, ValidationError
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
 from mcp.server.lowlevel.server import NotificationOptions
-from mcp.types import (
-    Tool, TextContent, CallToolRequest, CallToolResult,
-    ListResourcesResult, ListToolsResult
-)
+from mcp.types import Tool, TextContent
+from app.utils.http_client import get_mcp_http_client, close_mcp_http_clients
+from app.utils.schema import intern_tree
 from app.utils.logger import logger
 
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=asdict).encode()
+    _json_loads = json.loads
+
+
+@dataclass(slots=True)
+class _ToolCall:
+    """Body of a remote tool call"""
+    name: str
+    arguments: Dict[str, Any]
+
+
+@dataclass(slots=True)
+class _AuthData:
+    """Body of a remote login request"""
+    email: Optional[str]
+    password: Optional[str]
+    token: Optional[str]
+    auth_method: str
+
+
+# Tool catalog served to Claude Desktop; static, so built once at import
+_TOOL_SEARCH = Tool(
+    name="search_workplace",
+    description="Search for documents in workplace systems (Google Drive, Notion, Slack, Confluence)",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Search query"
+            },
+            "max_results": {
+                "type": "integer",
+                "description": "Maximum number of results to return",
+                "default": 10
+            },
+            "source": {
+                "type": "string",
+                "enum": ["gdrive", "notion", "slack", "confluence"],
+                "description": "Specific source to search (optional)"
+            },
+            "user_token": {
+                "type": "string",
+                "description": "User authentication token"
+            }
+        },
+        "required": ["query", "user_token"]
+    }
+)
+
+_TOOL_GET = Tool(
+    name="get_document_content",
+    description="Get the full content of a specific document",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "document_id": {
+                "type": "string",
+                "description": "ID of the document to retrieve"
+            },
+            "user_token": {
+                "type": "string",
+                "description": "User authentication token"
+            }
+        },
+        "required": ["document_id", "user_token"]
+    }
+)
+
+_TOOL_AUTH = Tool(
+    name="authenticate_user",
+    description="Authenticate user with Descope",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "email": {
+                "type": "string",
+                "description": "User email"
+            },
+            "password": {
+                "type": "string",
+                "description": "User password"
+            },
+            "token": {
+                "type": "string",
+                "description": "Authentication token (alternative to email/password)"
+            },
+            "auth_method": {
+                "type": "string",
+                "enum": ["email_password", "token"],
+                "default": "token",
+                "description": "Authentication method"
+            }
+        }
+    }
+)
+
+_STATIC_TOOLS = (_TOOL_SEARCH, _TOOL_GET, _TOOL_AUTH)
+
+# Schemas are compared and serialized repeatedly; share their strings
+for _tool in _STATIC_TOOLS:
+    _tool.inputSchema = intern_tree(_tool.inputSchema)
+del _tool
+
+# Argument validators, compiled once per tool
+_VALIDATORS = {tool.name: Draft202012Validator(tool.inputSchema) for tool in _STATIC_TOOLS}
+
+# Prebuilt list_tools payload; the MCP server only reads it when serializing
+_TOOL_LIST: List[Tool] = list(_STATIC_TOOLS)
+
+
+# Session persisted across client restarts, reused until shortly before expiry
+_SESSION_FILE = Path(
+    os.getenv("MCP_SESSION_FILE", "~/.cache/workplace-search/session.json")
+).expanduser()
+_SESSION_EXPIRY_MARGIN = 60
+
+# Tool calls issued within this window share one batch request
+_BATCH_WINDOW = 0.005
+
+# The server rejects larger batches, so a full batch is sent without waiting
+_MAX_BATCH_CALLS = int(os.getenv("MCP_MAX_BATCH_CALLS", 20))
+
+
+class _BatchLoader:
+    """Coalesces tool calls made within a short window into one HTTP round-trip"""
+    
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        window: float = _BATCH_WINDOW,
+        max_batch: int = _MAX_BATCH_CALLS
+    ):
+        self.http_client = http_client
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: deque = deque()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+    
+    async def load(self, tool_request: _ToolCall) -> Dict[str, Any]:
+        """Queue a tool call and wait for its slice of the batch response"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((tool_request, future))
+        if len(self._pending) >= self.max_batch:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._start_flush)
+        return await future
+    
+    def _start_flush(self):
+        """Hand the calls collected so far to a flush task"""
+        self._flush_handle = None
+        batch = list(self._pending)
+        self._pending.clear()
+        
+        task = asyncio.create_task(self._flush(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush(self, batch: List[tuple]):
+        """Send the collected calls and resolve each caller's future"""
+        try:
+            # A lone call goes to the single-call endpoint
+            if len(batch) == 1:
+                response = await self.http_client.post(
+                    "/mcp/call-tool", content=_json_dumps(batch[0][0])
+                )
+            else:
+                response = await self.http_client.post(
+                    "/mcp/call-tool-batch",
+                    content=_json_dumps({"calls": [request for request, _ in batch]})
+                )
+            
+            if response.status_code != 200:
+                raise httpx.HTTPStatusError(
+                    f"HTTP {response.status_code}", request=response.request, response=response
+                )
+            
+            data = _json_loads(response.content)
+            results = [data] if len(batch) == 1 else data["results"]
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
 class ClaudeMCPClient:
     """MCP Client that connects Claude Desktop to remote HTTP server"""
     
@@ -27,20 +229,23 @@ class ClaudeMCPClient:
         self.server_token = os.getenv("MCP_SERVER_TOKEN", "")
         self.session_token = None
         self.user_context = None
+        self._load_session()
         
         # Initialize MCP server for Claude Desktop
         self.mcp_server = Server("workplace-search-remote-client")
         self.setup_mcp_handlers()
-          # HTTP client for remote server
-        headers = {"Content-Type": "application/json"}
-        if self.server_token:
-            headers["Authorization"] = f"Bearer {self.server_token}"
-        
-        self.http_client = httpx.AsyncClient(
-            base_url=self.server_url,
-            timeout=30.0,
-            headers=headers
+        self._init_options = InitializationOptions(
+            server_name="workplace-search-remote-client",
+            server_version="1.0.0",
+            capabilities=self.mcp_server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities={}
+            )
         )
+        
+        # Pooled HTTP client for remote server, shared across instances
+        self.http_client = get_mcp_http_client(self.server_url, self.server_token)
+        self.batch_loader = _BatchLoader(self.http_client)
     
     def setup_mcp_handlers(self):
         """Setup MCP server handlers"""
@@ -48,151 +253,68 @@ class ClaudeMCPClient:
         @self.mcp_server.list_tools()
         async def handle_list_tools() -> List[Tool]:
             """List tools from remote server"""
-            try:
-                # response = await self.http_client.get("/mcp/tools")
-                # if response.status_code == 200:
-                #     data = response.json()
-                #     tools = []
-                #     for tool_data in data.get("tools", []):
-                #         tools.append(Tool(
-                #             name=tool_data["name"],
-                #             description=tool_data["description"],
-                #             inputSchema=tool_data["inputSchema"]
-                #         ))
-                tools = [
-                        Tool(
-                            name="search_workplace",
-                            description="Search for documents in workplace systems (Google Drive, Notion, Slack, Confluence)",
-                            inputSchema={
-                                "type": "object",
-                                "properties": {
-                                    "query": {
-                                        "type": "string",
-                                        "description": "Search query"
-                                    },
-                                    "max_results": {
-                                        "type": "integer",
-                                        "description": "Maximum number of results to return",
-                                        "default": 10
-                                    },
-                                    "source": {
-                                        "type": "string",
-                                        "enum": ["gdrive", "notion", "slack", "confluence"],
-                                        "description": "Specific source to search (optional)"
-                                    },
-                                    "user_token": {
-                                        "type": "string",
-                                        "description": "User authentication token"
-                                    }
-                                },
-                                "required": ["query", "user_token"]
-                            }
-                        ),
-                        Tool(
-                            name="get_document_content",
-                            description="Get the full content of a specific document",
-                            inputSchema={
-                                "type": "object",
-                                "properties": {
-                                    "document_id": {
-                                        "type": "string",
-                                        "description": "ID of the document to retrieve"
-                                    },
-                                    "user_token": {
-                                        "type": "string",
-                                        "description": "User authentication token"
-                                    }
-                                },
-                                "required": ["document_id", "user_token"]
-                            }
-                        ),
-                        Tool(
-                            name="authenticate_user",
-                            description="Authenticate user with Descope",
-                            inputSchema={
-                                "type": "object",
-                                "properties": {
-                                    "email": {
-                                        "type": "string",
-                                        "description": "User email"
-                                    },
-                                    "password": {
-                                        "type": "string",
-                                        "description": "User password"
-                                    },
-                                    "token": {
-                                        "type": "string",
-                                        "description": "Authentication token (alternative to email/password)"
-                                    },
-                                    "auth_method": {
-                                        "type": "string",
-                                        "enum": ["email_password", "token"],
-                                        "default": "token",
-                                        "description": "Authentication method"
-                                    }
-                                }
-                            }
-                        )
-                    ]
-
-                return tools
-                # else:
-                #     return []
-            except Exception as e:
-                logger.error(f"Error listing tools: {e}")
-                return []
+            # The catalog is static, so it is served without asking the server
+            return _TOOL_LIST
         
         @self.mcp_server.call_tool()
         async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
             """Call tool on remote server"""
             try:
+                # Add session token to arguments if available
+                if name != "authenticate_user" and self.session_token and "user_token" not in arguments:
+                    arguments["user_token"] = self.session_token
+                
+                # Reject malformed calls without a round-trip to the server
+                validator = _VALIDATORS.get(name)
+                if validator is not None:
+                    try:
+                        validator.validate(arguments)
+                    except ValidationError as e:
+                        return [TextContent(type="text", text=f"Invalid arguments for tool {name}: {e.message}")]
+                
                 # Special handling for authentication
                 if name == "authenticate_user":
                     return await self._handle_authentication(arguments)
                 
-                # Add session token to arguments if available
-                if self.session_token and "user_token" not in arguments:
-                    arguments["user_token"] = self.session_token
-                
                 # Call remote server
-                tool_request = {
-                    "name": name,
-                    "arguments": arguments
-                }
+                tool_request = _ToolCall(name=name, arguments=arguments)
                 
-                response = await self.http_client.post("/mcp/call-tool", json=tool_request)
+                try:
+                    data = await self.batch_loader.load(tool_request)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 401:
+                        # Stored session was rejected; the next call must re-authenticate
+                        self._clear_session()
+                    error_msg = f"HTTP {e.response.status_code}: {e.response.text}"
+                    return [TextContent(type="text", text=f"Server error: {error_msg}")]
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("success", False):
-                        results = data.get("result", [])
-                        return [TextContent(type="text", text=result) for result in results]
-                    else:
-                        error_msg = data.get("error", "Unknown error")
-                        return [TextContent(type="text", text=f"Error: {error_msg}")]
+                if data.get("success", False):
+                    results = data.get("result", [])
+                    return [TextContent(type="text", text=result) for result in results]
                 else:
-                    error_msg = f"HTTP {response.status_code}: {response.text}"
-                    return [TextContent(type="text", text=f"Server error: {error_msg}")]
+                    error_msg = data.get("error", "Unknown error")
+                    return [TextContent(type="text", text=f"Error: {error_msg}")]
                     
-            except Exception as e:
+            except (httpx.HTTPError, ValueError, KeyError) as e:
                 return [TextContent(type="text", text=f"Error calling tool {name}: {str(e)}")]
     
     async def _handle_authentication(self, arguments: Dict[str, Any]) -> List[TextContent]:
         """Handle authentication with remote server"""
         try:
-            auth_data = {
-                "email": arguments.get("email"),
-                "password": arguments.get("password"),
-                "token": arguments.get("token"),
-                "auth_method": arguments.get("auth_method", "token")
-            }
+            auth_data = _AuthData(
+                email=arguments.get("email"),
+                password=arguments.get("password"),
+                token=arguments.get("token"),
+                auth_method=arguments.get("auth_method", "token")
+            )
             
-            response = await self.http_client.post("/auth/login", json=auth_data)
+            response = await self.http_client.post("/auth/login", content=_json_dumps(auth_data))
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 self.session_token = data.get("token")
                 self.user_context = data.get("user")
+                self._save_session(data.get("expires_in", 3600))
                 
                 result = {
                     "success": True,
@@ -203,7 +325,7 @@ class ClaudeMCPClient:
                 
                 return [TextContent(type="text", text=json.dumps(result, indent=2))]
             else:
-                error_data = response.json() if response.headers.get("content-type", "").startswith("application/json") else {"detail": response.text}
+                error_data = _json_loads(response.content) if response.headers.get("content-type", "").startswith("application/json") else {"detail": response.text}
                 result = {
                     "success": False,
                     "error": error_data.get("detail", "Authentication failed"),
@@ -211,40 +333,93 @@ class ClaudeMCPClient:
                 }
                 return [TextContent(type="text", text=json.dumps(result, indent=2))]
                 
-        except Exception as e:
+        except (httpx.HTTPError, ValueError, KeyError) as e:
             result = {
                 "success": False,
                 "error": f"Authentication request failed: {str(e)}"
             }
             return [TextContent(type="text", text=json.dumps(result, indent=2))]
     
+    def _load_session(self):
+        """Restore a saved session for this server if it has not expired"""
+        try:
+            session = _json_loads(_SESSION_FILE.read_bytes())
+        except (OSError, ValueError):
+            return
+        
+        if (
+            session.get("server_url") == self.server_url
+            and session.get("expires_at", 0) > time.time() + _SESSION_EXPIRY_MARGIN
+        ):
+            self.session_token = session.get("token")
+            self.user_context = session.get("user")
+    
+    def _save_session(self, expires_in: int):
+        """Persist the current session so restarts skip re-authentication"""
+        session = {
+            "server_url": self.server_url,
+            "token": self.session_token,
+            "user": self.user_context,
+            "expires_at": time.time() + expires_in
+        }
+        try:
+            _SESSION_FILE.parent.mkdir(parents=True, exist_ok=True)
+            _SESSION_FILE.touch(mode=0o600, exist_ok=True)
+            _SESSION_FILE.write_bytes(_json_dumps(session))
+        except OSError as e:
+            logger.warning(f"Could not persist session: {e}")
+    
+    def _clear_session(self):
+        """Forget the current session, in memory and on disk"""
+        self.session_token = None
+        self.user_context = None
+        try:
+            _SESSION_FILE.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not remove saved session: {e}")
+    
+    async def _warm_up(self):
+        """Open a pooled connection to the remote server ahead of the first tool call"""
+        try:
+            response = await self.http_client.get("/health")
+            logger.debug(f"Remote server health: HTTP {response.status_code}")
+        except httpx.HTTPError as e:
+            logger.warning(f"Remote server not reachable yet: {e}")
+    
     async def run_stdio(self):
         """Run MCP server over stdio for Claude Desktop"""
         from mcp.server.stdio import stdio_server
         
-        async with stdio_server() as (read_stream, write_stream):
-            await self.mcp_server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="workplace-search-remote-client",
-                    server_version="1.0.0",
-                    capabilities=self.mcp_server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities={}
-                    )
-                )
-            )
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                # Warm the connection to the remote server while the MCP
+                # handshake with Claude Desktop is in progress
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(self._warm_up())
+                    tg.create_task(self.mcp_server.run(
+                        read_stream,
+                        write_stream,
+                        self._init_options
+                    ))
+        finally:
+            await close_mcp_http_clients()
     
     def run(self):
         """Run the client"""
-        asyncio.run(self.run_stdio())
+        try:
+            import uvloop
+        except ImportError:
+            asyncio.run(self.run_stdio())
+        else:
+            uvloop.run(self.run_stdio())
     
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.http_client.aclose()
+        # The pooled client outlives this wrapper; close_mcp_http_clients()
+        # releases it at shutdown
+        pass
 
 
 if __name__ == "__main__":
@@ -267,7 +442,7 @@ if __name__ == "__main__":
             except Exception as e:
                 print(f"✗ Connection failed: {e}")
             finally:
-                await client.http_client.aclose()
+                await close_mcp_http_clients()
         
         asyncio.run(test_connection())
     else:
@@ -1,6 +1,7 @@
-from typing import List, Optional, Dict, Any, Literal
+from functools import cached_property
+from typing import List, Optional, Dict, Any, FrozenSet, Literal
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -12,18 +13,29 @@ class DocumentSource(str, Enum):
     confluence = "confluence"
 
 
-class UserContext(BaseModel):
+class _FrozenModel(BaseModel):
+    """Base for the shared models: immutable once built, unknown fields ignored"""
+    model_config = ConfigDict(frozen=True, extra="ignore", validate_default=False)
+
+
+class UserContext(_FrozenModel):
     """User context for authentication and authorization"""
     user_id: str
     email: str
+    authenticated: bool = True
     access_token: Optional[str] = None
     scopes: List[str] = Field(default_factory=list)
     organization_id: Optional[str] = None
     permissions: Dict[str, Any] = Field(default_factory=dict)
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    @cached_property
+    def scope_set(self) -> FrozenSet[str]:
+        """Granted scopes as a set, built once per context for O(1) membership checks"""
+        return frozenset(self.scopes)
 
 
-class SearchResult(BaseModel):
+class SearchResult(_FrozenModel):
     """Search result from any document source"""
     id: str
     title: str
@@ -36,7 +48,7 @@ class SearchResult(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
-class DocumentContent(BaseModel):
+class DocumentContent(_FrozenModel):
     """Full document content"""
     id: str
     title: str
@@ -48,7 +60,21 @@ class DocumentContent(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
-class RecentUpdate(BaseModel):
+class SourceDocument(_FrozenModel):
+    """Reference to a document a summary was built from"""
+    id: str
+    title: str
+    source: DocumentSource
+
+
+class SummaryResult(_FrozenModel):
+    """Summary of one or more documents"""
+    summary: str
+    key_points: List[str] = Field(default_factory=list)
+    source_documents: List[SourceDocument] = Field(default_factory=list)
+
+
+class RecentUpdate(_FrozenModel):
     """Recent update information"""
     id: str
     title: str
@@ -61,7 +87,7 @@ class RecentUpdate(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
-class SearchRequest(BaseModel):
+class SearchRequest(_FrozenModel):
     """Request for document search"""
     query: str
     sources: Optional[List[DocumentSource]] = None
@@ -69,33 +95,33 @@ class SearchRequest(BaseModel):
     filters: Dict[str, Any] = Field(default_factory=dict)
 
 
-class DocumentRequest(BaseModel):
+class DocumentRequest(_FrozenModel):
     """Request for document content"""
     document_id: str
     source: DocumentSource
 
 
-class RecentUpdatesRequest(BaseModel):
+class RecentUpdatesRequest(_FrozenModel):
     """Request for recent updates"""
     days: int = Field(default=7, ge=1, le=30)
     sources: Optional[List[DocumentSource]] = None
     max_results: int = Field(default=20, ge=1, le=100)
 
 
-class SummaryRequest(BaseModel):
+class SummaryRequest(_FrozenModel):
     """Request for document summarization"""
     document_id: str
     source: DocumentSource
     summary_type: Literal["brief", "detailed", "key_points"] = "brief"
 
 
-class MCPToolResponse(BaseModel):
+class MCPToolResponse(_FrozenModel):
     """Standard MCP tool response"""
     content: List[Dict[str, Any]]
     isError: bool = False
 
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(_FrozenModel):
     """Error response"""
     error: str
     code: str
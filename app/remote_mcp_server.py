@@ -6,14 +6,21 @@ Integrates with Descope authentication, Cequence security, and Google Drive API
 import os
 import json
 import asyncio
-from typing import Any, Dict, List, Optional, Sequence
+import functools
+import hashlib
+import importlib.util
+import secrets
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 import logging
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request, Depends, status
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from cachetools import TTLCache
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
 import uvicorn
 
 # MCP imports
@@ -23,42 +30,250 @@ from mcp.types import ( Tool, TextContent
 )
 
 # Internal imports
-from app.auth.descope_auth import DescopeAuthenticator
-from app.auth.cequence_gateway import CequenceGateway
-from app.adapters.google_drive_adapter import GoogleDriveAdapter
-from app.models.models import UserContext, DocumentSource
-from app.utils.logger import logger
+from app.auth.descope_auth import DescopeAuthenticator, DescopeUser
+from app.auth.cequence_gateway import CequenceGateway, get_client_ip, get_gateway
+from app.adapters.google_drive_adapter import GoogleDriveAdapter, close_http_client
+from app.models.models import UserContext, DocumentSource, SearchResult
+from app.utils.logger import logger, request_user
+from app.utils.schema import intern_tree
+
+try:
+    from orjson import dumps as _json_dumps
+    from fastapi.responses import ORJSONResponse as _DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as _DefaultResponse
+    
+    def _json_default(obj: Any) -> Any:
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), default=_json_default).encode()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the Cequence gateway's connection pool for the lifetime of the app"""
+    gateway = CequenceGateway()
+    await gateway.startup()
+    app.state.gateway = gateway
+    _encode_health_body(app)
+    health_refresher = asyncio.create_task(_refresh_health_body(app))
+    try:
+        yield
+    finally:
+        health_refresher.cancel()
+        await gateway.close()
+        await close_http_client()
+        if auth_redis is not None:
+            await auth_redis.aclose()
 
 
 # FastAPI app for HTTP endpoints
 app = FastAPI(
     title="Workplace Search MCP Server",
     description="Model Context Protocol server with authentication and Google Drive integration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=_DefaultResponse
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Fixed errors raised on hot failure paths; the traceback is cleared on each
+# raise so a shared instance never accumulates frames
+_EXC_AUTH_REQUIRED = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Authentication required"
+)
+_EXC_INVALID_TOKEN = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid authentication token"
+)
+_EXC_BLOCKED = HTTPException(
+    status_code=status.HTTP_403_FORBIDDEN,
+    detail="Request blocked by security policy"
+)
+_EXC_TOOL_NAME_REQUIRED = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Tool name is required"
 )
 
-# Security
-security = HTTPBearer(auto_error=False)
+# Development-mode tokens are random so they can't be guessed or collide
+_MOCK_TOKEN_PREFIX = "mock_token_"
+
+# Encodes a whole result list to JSON bytes in one pass through pydantic-core
+_SEARCH_RESULTS_ADAPTER = TypeAdapter(List[SearchResult])
 
 # Global instances
 descope_auth = DescopeAuthenticator()
-cequence_gateway = CequenceGateway()
-authenticated_users: Dict[str, UserContext] = {}
+# Bounded so abandoned tokens age out instead of growing the process forever
+_AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 3600))
+authenticated_users: TTLCache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", 10_000)),
+    ttl=_AUTH_CACHE_TTL
+)
+
+# Shared across workers when Redis is configured, so one verification warms them all
+_redis_url = os.getenv("REDIS_URL")
+auth_redis = aioredis.from_url(_redis_url) if _redis_url else None
+
+
+def _token_key(token: str) -> bytes:
+    """Fixed-size cache key for a bearer token, so raw tokens are never stored as keys"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _forget_flight(inflight: Dict[bytes, asyncio.Task], key: bytes, task: asyncio.Task):
+    """Drop a finished flight, marking its exception retrieved in case no caller is left"""
+    if inflight.get(key) is task:
+        del inflight[key]
+    if not task.cancelled():
+        task.exception()
+
+
+async def _single_flight(inflight: Dict[bytes, asyncio.Task], key: bytes, work: Callable[[], Awaitable[Any]]) -> Any:
+    """Run work once per key, sharing its outcome with callers that arrive while it runs
+    
+    The work runs in its own task and every caller awaits it through a shield,
+    so one caller being cancelled never cancels the work for the others.
+    """
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(work())
+        inflight[key] = task
+        task.add_done_callback(functools.partial(_forget_flight, inflight, key))
+    return await asyncio.shield(task)
+
+
+# Recent Descope verifications and those in progress, so repeated and concurrent
+# checks of one token share a single Descope round trip
+_verified_tokens: TTLCache = TTLCache(maxsize=4096, ttl=300)
+_inflight_verifications: Dict[bytes, asyncio.Task] = {}
+
+
+async def verify_token_cached(token: str) -> Optional[DescopeUser]:
+    """Verify a token with Descope, reusing recent and in-flight results; None if invalid"""
+    key = _token_key(token)
+    descope_user = _verified_tokens.get(key)
+    if descope_user is not None:
+        return descope_user
+    
+    async def verify() -> Optional[DescopeUser]:
+        descope_user = await descope_auth.verify_token(token)
+        # Rejections are not cached, so a token that starts working is seen at once
+        if descope_user:
+            _verified_tokens[key] = descope_user
+        return descope_user
+    
+    return await _single_flight(_inflight_verifications, key, verify)
+
+
+async def _build_user_context(token: str) -> Optional[UserContext]:
+    """Verify a token with Descope and build its user context; None if the token is invalid
+    
+    Contexts are cached in memory and in Redis, so they never carry the token itself.
+    """
+    if not descope_auth.enabled:
+        logger.warning("Descope authentication disabled - using mock authentication")
+        # Mock user for development
+        return UserContext(
+            user_id="mock_user",
+            email="mock@example.com",
+            scopes=["drive.readonly"],
+            permissions={"google_drive": True}
+        )
+    
+    descope_user = await verify_token_cached(token)
+    if not descope_user:
+        return None
+    
+    return UserContext(
+        user_id=descope_user.user_id,
+        email=descope_user.email,
+        scopes=["drive.readonly"],
+        permissions={"google_drive": True},
+        metadata={
+            "name": descope_user.name,
+            "verified_email": descope_user.verified_email,
+            "roles": descope_user.roles
+        }
+    )
+
+
+async def _load_shared_user(key: bytes) -> Optional[UserContext]:
+    """Fetch a user context another worker cached in Redis"""
+    if auth_redis is None:
+        return None
+    try:
+        raw = await auth_redis.get(b"user:" + key)
+    except RedisError as e:
+        logger.error("Redis user cache lookup failed: {}", e)
+        return None
+    return UserContext.model_validate_json(raw) if raw else None
+
+
+async def _store_shared_user(key: bytes, user_context: UserContext):
+    """Publish a verified user context to the other workers through Redis"""
+    if auth_redis is None:
+        return
+    try:
+        payload = user_context.model_dump_json(exclude={"access_token"})
+        await auth_redis.set(b"user:" + key, payload, ex=_AUTH_CACHE_TTL)
+    except RedisError as e:
+        logger.error("Redis user cache update failed: {}", e)
+
+
+# Cold token resolutions in progress, so a burst on one token does a single
+# Redis lookup and context build
+_inflight_users: Dict[bytes, asyncio.Task] = {}
+
+
+async def resolve_user(token: str) -> Optional[UserContext]:
+    """Resolve a bearer token to a cached user context; None if the token is invalid"""
+    key = _token_key(token)
+    user_context = authenticated_users.get(key)
+    if user_context is not None:
+        return user_context
+    
+    async def resolve() -> Optional[UserContext]:
+        user_context = await _load_shared_user(key)
+        if user_context is not None:
+            authenticated_users[key] = user_context
+            return user_context
+        
+        user_context = await _build_user_context(token)
+        if user_context is not None:
+            authenticated_users[key] = user_context
+            await _store_shared_user(key, user_context)
+            logger.info("User {} authenticated successfully", user_context.email)
+        return user_context
+    
+    return await _single_flight(_inflight_users, key, resolve)
+
+
+# Drive adapters per user, so loaded OAuth credentials are reused across requests
+_drive_adapters: TTLCache = TTLCache(maxsize=2048, ttl=1800)
+
+
+def get_drive_adapter(user_context: UserContext) -> GoogleDriveAdapter:
+    """Get the cached Google Drive adapter for a user, created on first use"""
+    adapter = _drive_adapters.get(user_context.user_id)
+    if adapter is None:
+        adapter = GoogleDriveAdapter(user_context)
+        _drive_adapters[user_context.user_id] = adapter
+    return adapter
+
 
 # MCP Server instance
 mcp_server = Server("workplace-search-mcp")
 
 
-class AuthRequest(BaseModel):
+class _RequestModel(BaseModel):
+    """Base for request bodies: immutable, with unknown fields rejected"""
+    model_config = ConfigDict(frozen=True, extra="forbid", validate_default=False)
+
+
+class AuthRequest(_RequestModel):
     """Authentication request model"""
     token: Optional[str] = None
     email: Optional[str] = None
@@ -66,117 +281,191 @@ class AuthRequest(BaseModel):
     auth_method: str = "token"  # "token", "email_password", "oauth"
 
 
-class SearchRequest(BaseModel):
+class SearchRequest(_RequestModel):
     """Search request model"""
     query: str
-    max_results: int = 10
+    max_results: int = Field(default=10, ge=1, le=100)
     source: Optional[DocumentSource] = None
     user_token: str
 
 
-class DocumentRequest(BaseModel):
+class DocumentRequest(_RequestModel):
     """Document content request model"""
     document_id: str
     user_token: str
 
 
-async def verify_authentication(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserContext:
+# A batch fans out concurrently, so its size is bounded like any other request
+_MAX_BATCH_CALLS = int(os.getenv("MCP_MAX_BATCH_CALLS", 20))
+
+
+class ToolCall(_RequestModel):
+    """One MCP tool invocation"""
+    name: str = Field(min_length=1)
+    arguments: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ToolBatchRequest(_RequestModel):
+    """Several MCP tool invocations sent in one HTTP request"""
+    calls: List[ToolCall] = Field(max_length=_MAX_BATCH_CALLS)
+
+
+def _bearer_token(scope) -> Optional[str]:
+    """Read the bearer token straight from the raw ASGI headers"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if credentials and scheme.lower() == "bearer":
+                return credentials
+            return None
+    return None
+
+
+async def verify_authentication(token: Optional[str]) -> UserContext:
     """Verify user authentication through Descope and Cequence"""
-    if not credentials:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication required"
-        )
-    
-    token = credentials.credentials
-    
-    # Check if user is already authenticated
-    if token in authenticated_users:
-        user_context = authenticated_users[token]
-        logger.info(f"User {user_context.email} already authenticated")
-        return user_context
-    
-    # Verify token with Descope
-    if not descope_auth.enabled:
-        logger.warning("Descope authentication disabled - using mock authentication")
-        # Mock user for development
-        user_context = UserContext(
-            user_id="mock_user",
-            email="mock@example.com",
-            access_token=token,
-            scopes=["drive.readonly"],
-            permissions={"google_drive": True}
-        )
-        authenticated_users[token] = user_context
-        return user_context
+    if not token:
+        raise _EXC_AUTH_REQUIRED.with_traceback(None)
     
     try:
-        # Verify token with Descope
-        descope_user = await descope_auth.verify_token(token)
-        if not descope_user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token"
-            )
-        
-        # Create user context
-        user_context = UserContext(
-            user_id=descope_user.user_id,
-            email=descope_user.email,
-            access_token=token,
-            scopes=["drive.readonly"],
-            permissions={"google_drive": True},
-            metadata={
-                "name": descope_user.name,
-                "verified_email": descope_user.verified_email,
-                "roles": descope_user.roles
-            }
-        )
-        
-        # Cache authenticated user
-        authenticated_users[token] = user_context
-        logger.info(f"User {user_context.email} authenticated successfully")
-        
+        user_context = await resolve_user(token)
+        if user_context is None:
+            raise _EXC_INVALID_TOKEN.with_traceback(None)
+        request_user.set(user_context.email)
         return user_context
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Authentication failed: {e}")
+        logger.error("Authentication failed: {}", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Authentication failed: {str(e)}"
         )
 
 
+# Routes whose handlers read the caller from request.state.user
+_AUTHENTICATED_PATHS = frozenset({"/search", "/document"})
+
+
+class AuthMiddleware:
+    """Authenticate the bearer-token routes before FastAPI routes the request.
+
+    Plain ASGI rather than a dependency: the token is read from the raw
+    headers, and no Request wrapper or dependency graph is built per call.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in _AUTHENTICATED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        try:
+            user_context = await verify_authentication(_bearer_token(scope))
+        except HTTPException as e:
+            # Middleware sits outside FastAPI's exception handlers, so answer directly
+            response = _DefaultResponse({"detail": e.detail}, status_code=e.status_code)
+            await response(scope, receive, send)
+            return
+        
+        scope.setdefault("state", {})["user"] = user_context
+        await self.app(scope, receive, send)
+
+
+# Probes must keep answering even while a client is at its cap
+_UNLIMITED_PATHS = frozenset({"/health"})
+
+
+class ConcurrencyLimitMiddleware:
+    """Cap each client's in-flight requests, holding the slot until the response is sent"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in _UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope)
+        gateway: CequenceGateway = request.app.state.gateway
+        client_ip = get_client_ip(request)
+        try:
+            slot = await gateway.acquire_request_slot(client_ip)
+        except HTTPException as e:
+            response = _DefaultResponse({"detail": e.detail}, status_code=e.status_code)
+            await response(scope, receive, send)
+            return
+        
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await gateway.release_request_slot(client_ip, slot)
+
+
+# Added before CORS so CORS wraps them: preflights skip both, and 401/429
+# responses carry CORS headers. Auth runs inside the concurrency slot.
+app.add_middleware(AuthMiddleware)
+app.add_middleware(ConcurrencyLimitMiddleware)
+
+# CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
 async def security_check(request: Request) -> Dict[str, Any]:
     """Perform security analysis with Cequence"""
-    if not cequence_gateway.config.enabled:
+    gateway = get_gateway(request)
+    if not gateway.config.enabled:
         logger.debug("Cequence security disabled")
         return {"allowed": True, "risk_score": 0.0}
     
     try:
-        analysis_result = await cequence_gateway.analyze_request(request)
+        analysis_result = await gateway.analyze_request(request)
         
         if not analysis_result.get("allowed", True):
-            logger.warning(f"Request blocked by Cequence: {analysis_result}")
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Request blocked by security policy"
-            )
+            logger.warning("Request blocked by Cequence: {}", analysis_result)
+            raise _EXC_BLOCKED.with_traceback(None)
         
         risk_score = analysis_result.get("risk_score", 0.0)
         if risk_score > 0.7:
-            logger.warning(f"High risk request detected: {risk_score}")
+            logger.warning("High risk request detected: {}", risk_score)
         
         return analysis_result
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Security analysis failed: {e}")
+        logger.error("Security analysis failed: {}", e)
         # Allow request if security analysis fails
         return {"allowed": True, "risk_score": 0.0, "error": str(e)}
 
 
+async def run_with_security_check(request: Request, work: Awaitable[Any]) -> Tuple[Dict[str, Any], Any]:
+    """Run the security check concurrently with the work; a blocking verdict cancels the work"""
+    security_task = asyncio.create_task(security_check(request))
+    work_task = asyncio.ensure_future(work)
+    try:
+        await asyncio.wait((security_task, work_task), return_when=asyncio.FIRST_EXCEPTION)
+        # Awaited first so a blocked request reports 403 even when the work also failed
+        security_result = await security_task
+        return security_result, await work_task
+    finally:
+        for task in (security_task, work_task):
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Mark a failure the caller never awaited as retrieved
+                task.exception()
+
+
 # FastAPI Routes
 
 @app.post("/auth/login")
@@ -188,7 +477,7 @@ async def login(auth_request: AuthRequest, request: Request):
     
     if not descope_auth.enabled:
         # Mock authentication for development
-        mock_token = f"mock_token_{datetime.now().timestamp()}"
+        mock_token = _MOCK_TOKEN_PREFIX + secrets.token_hex(16)
         return {
             "token": mock_token,
             "user": {
@@ -207,7 +496,7 @@ async def login(auth_request: AuthRequest, request: Request):
             )
         elif auth_request.auth_method == "token":
             # Token verification
-            descope_user = await descope_auth.verify_token(auth_request.token)
+            descope_user = await verify_token_cached(auth_request.token)
             if not descope_user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -215,7 +504,7 @@ async def login(auth_request: AuthRequest, request: Request):
                 )
             result = {
                 "token": auth_request.token,
-                "user": descope_user.dict(),
+                "user": descope_user.model_dump(),
                 "expires_in": 3600
             }
         else:
@@ -227,7 +516,7 @@ async def login(auth_request: AuthRequest, request: Request):
         return result
         
     except Exception as e:
-        logger.error(f"Login failed: {e}")
+        logger.error("Login failed: {}", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Authentication failed: {str(e)}"
@@ -238,26 +527,27 @@ async def login(auth_request: AuthRequest, request: Request):
 async def search_documents(
     search_request: SearchRequest,
     request: Request,
-    user_context: UserContext = Depends(verify_authentication)
+    gateway: CequenceGateway = Depends(get_gateway)
 ):
     """Search documents in Google Drive"""
-    
-    # Security check
-    security_result = await security_check(request)
+    user_context: UserContext = request.state.user
     
     try:
         # Initialize Google Drive adapter
-        drive_adapter = GoogleDriveAdapter(user_context)
+        drive_adapter = get_drive_adapter(user_context)
         
-        # Perform search
-        results = await drive_adapter.search(
-            query=search_request.query,
-            max_results=search_request.max_results
+        # Perform search alongside the security check
+        security_result, results = await run_with_security_check(
+            request,
+            drive_adapter.search(
+                query=search_request.query,
+                max_results=search_request.max_results
+            )
         )
         
-        # Log security analytics
-        if cequence_gateway.config.enabled:
-            await cequence_gateway.log_analytics({
+        # Queue security analytics; delivery is batched in the background
+        if gateway.config.enabled:
+            gateway.enqueue_analytics({
                 "event_type": "search",
                 "user_id": user_context.user_id,
                 "query": search_request.query,
@@ -265,14 +555,17 @@ async def search_documents(
                 "risk_score": security_result.get("risk_score", 0.0)
             })
         
-        return {
-            "results": [result.dict() for result in results],
-            "total_count": len(results),
-            "query": search_request.query
-        }
+        body = (
+            b'{"results":' + _SEARCH_RESULTS_ADAPTER.dump_json(results)
+            + b',"total_count":' + str(len(results)).encode()
+            + b',"query":' + _json_dumps(search_request.query) + b"}"
+        )
+        return Response(content=body, media_type="application/json")
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Search failed: {e}")
+        logger.error("Search failed: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Search failed: {str(e)}"
@@ -283,133 +576,175 @@ async def search_documents(
 async def get_document_content(
     doc_request: DocumentRequest,
     request: Request,
-    user_context: UserContext = Depends(verify_authentication)
+    gateway: CequenceGateway = Depends(get_gateway)
 ):
     """Get document content from Google Drive"""
-    
-    # Security check
-    security_result = await security_check(request)
+    user_context: UserContext = request.state.user
     
     try:
         # Initialize Google Drive adapter
-        drive_adapter = GoogleDriveAdapter(user_context)
+        drive_adapter = get_drive_adapter(user_context)
         
-        # Get document content
-        document = await drive_adapter.get_document(doc_request.document_id)
+        # Get document content alongside the security check
+        security_result, document = await run_with_security_check(
+            request,
+            drive_adapter.get_document(doc_request.document_id)
+        )
         
-        # Log security analytics
-        if cequence_gateway.config.enabled:
-            await cequence_gateway.log_analytics({
+        # Queue security analytics; delivery is batched in the background
+        if gateway.config.enabled:
+            gateway.enqueue_analytics({
                 "event_type": "document_access",
                 "user_id": user_context.user_id,
                 "document_id": doc_request.document_id,
                 "risk_score": security_result.get("risk_score", 0.0)
             })
         
-        return document.dict()
+        return Response(content=document.model_dump_json(), media_type="application/json")
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Document retrieval failed: {e}")
+        logger.error("Document retrieval failed: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Document retrieval failed: {str(e)}"
         )
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
+def _encode_health_body(app: FastAPI):
+    """Encode the health response with the current timestamp"""
+    app.state.health_body = _json_dumps({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "services": {
             "descope_auth": descope_auth.enabled,
-            "cequence_security": cequence_gateway.config.enabled,
+            "cequence_security": app.state.gateway.config.enabled,
             "google_drive": True
         }
-    }
+    })
+
+
+async def _refresh_health_body(app: FastAPI):
+    """Re-encode the health response once a second so probes only copy bytes"""
+    while True:
+        await asyncio.sleep(1)
+        _encode_health_body(app)
+
+
+@app.get("/health")
+async def health_check(request: Request):
+    """Health check endpoint"""
+    return Response(content=request.app.state.health_body, media_type="application/json")
 
 
 # MCP Server Implementation
 
-@mcp_server.list_tools()
-async def handle_list_tools() -> List[Tool]:
-    """List available MCP tools"""
-    return [
-        Tool(
-            name="search_workplace",
-            description="Search for documents in workplace systems (Google Drive, Notion, Slack, Confluence)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query"
-                    },
-                    "max_results": {
-                        "type": "integer",
-                        "description": "Maximum number of results to return",
-                        "default": 10
-                    },
-                    "source": {
-                        "type": "string",
-                        "enum": ["gdrive", "notion", "slack", "confluence"],
-                        "description": "Specific source to search (optional)"
-                    },
-                    "user_token": {
-                        "type": "string",
-                        "description": "User authentication token"
-                    }
+# The tool list is static, so it is built once and served pre-encoded over HTTP
+_TOOLS: List[Tool] = [
+    Tool(
+        name="search_workplace",
+        description="Search for documents in workplace systems (Google Drive, Notion, Slack, Confluence)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Search query"
                 },
-                "required": ["query", "user_token"]
-            }
-        ),
-        Tool(
-            name="get_document_content",
-            description="Get the full content of a specific document",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "document_id": {
-                        "type": "string",
-                        "description": "ID of the document to retrieve"
-                    },
-                    "user_token": {
-                        "type": "string",
-                        "description": "User authentication token"
-                    }
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of results to return",
+                    "default": 10
                 },
-                "required": ["document_id", "user_token"]
-            }
-        ),
-        Tool(
-            name="authenticate_user",
-            description="Authenticate user with Descope",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "email": {
-                        "type": "string",
-                        "description": "User email"
-                    },
-                    "password": {
-                        "type": "string",
-                        "description": "User password"
-                    },
-                    "token": {
-                        "type": "string",
-                        "description": "Authentication token (alternative to email/password)"
-                    },
-                    "auth_method": {
-                        "type": "string",
-                        "enum": ["email_password", "token"],
-                        "default": "token",
-                        "description": "Authentication method"
-                    }
+                "source": {
+                    "type": "string",
+                    "enum": ["gdrive", "notion", "slack", "confluence"],
+                    "description": "Specific source to search (optional)"
+                },
+                "user_token": {
+                    "type": "string",
+                    "description": "User authentication token"
+                }
+            },
+            "required": ["query", "user_token"]
+        }
+    ),
+    Tool(
+        name="get_document_content",
+        description="Get the full content of a specific document",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "document_id": {
+                    "type": "string",
+                    "description": "ID of the document to retrieve"
+                },
+                "user_token": {
+                    "type": "string",
+                    "description": "User authentication token"
+                }
+            },
+            "required": ["document_id", "user_token"]
+        }
+    ),
+    Tool(
+        name="authenticate_user",
+        description="Authenticate user with Descope",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "email": {
+                    "type": "string",
+                    "description": "User email"
+                },
+                "password": {
+                    "type": "string",
+                    "description": "User password"
+                },
+                "token": {
+                    "type": "string",
+                    "description": "Authentication token (alternative to email/password)"
+                },
+                "auth_method": {
+                    "type": "string",
+                    "enum": ["email_password", "token"],
+                    "default": "token",
+                    "description": "Authentication method"
                 }
             }
-        )
+        }
+    )
+]
+
+# Schemas are compared and serialized repeatedly; share their strings
+for _tool in _TOOLS:
+    _tool.inputSchema = intern_tree(_tool.inputSchema)
+del _tool
+
+_TOOLS_JSON: bytes = _json_dumps({
+    "tools": [
+        {
+            "name": tool.name,
+            "description": tool.description,
+            "inputSchema": tool.inputSchema
+        }
+        for tool in _TOOLS
     ]
+})
+
+
+@mcp_server.list_tools()
+async def handle_list_tools() -> List[Tool]:
+    """List available MCP tools"""
+    return _TOOLS
+
+
+# Fixed error replies shared by every failed tool call
+_ERR_QUERY_REQUIRED = TextContent(type="text", text="Error: Query parameter is required")
+_ERR_DOCUMENT_ID_REQUIRED = TextContent(type="text", text="Error: Document ID is required")
+_ERR_TOKEN_REQUIRED = TextContent(type="text", text="Error: User token is required for authentication")
+_ERR_INVALID_TOKEN = TextContent(type="text", text="Error: Invalid authentication token")
 
 
 @mcp_server.call_tool()
@@ -417,17 +752,13 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextCon
     """Handle MCP tool calls"""
     
     try:
-        if name == "authenticate_user":
-            return await handle_authenticate_tool(arguments)
-        elif name == "search_workplace":
-            return await handle_search_tool(arguments)
-        elif name == "get_document_content":
-            return await handle_document_tool(arguments)
-        else:
+        handler = _TOOL_HANDLERS.get(name)
+        if handler is None:
             raise ValueError(f"Unknown tool: {name}")
+        return await handler(arguments)
             
     except Exception as e:
-        logger.error(f"Tool execution failed for {name}: {e}")
+        logger.error("Tool execution failed for {}: {}", name, e)
         return [TextContent(
             type="text",
             text=f"Error executing tool {name}: {str(e)}"
@@ -439,7 +770,7 @@ async def handle_authenticate_tool(arguments: Dict[str, Any]) -> List[TextConten
     
     if not descope_auth.enabled:
         # Mock authentication for development
-        mock_token = f"mock_token_{datetime.now().timestamp()}"
+        mock_token = _MOCK_TOKEN_PREFIX + secrets.token_hex(16)
         result = {
             "success": True,
             "token": mock_token,
@@ -471,14 +802,14 @@ async def handle_authenticate_tool(arguments: Dict[str, Any]) -> List[TextConten
                 if not token:
                     raise ValueError("Token required for token authentication")
                 
-                descope_user = await descope_auth.verify_token(token)
+                descope_user = await verify_token_cached(token)
                 if not descope_user:
                     raise ValueError("Invalid token")
                 
                 result = {
                     "success": True,
                     "token": token,
-                    "user": descope_user.dict(),
+                    "user": descope_user.model_dump(),
                     "message": "Token verification successful"
                 }
             else:
@@ -493,64 +824,29 @@ async def handle_authenticate_tool(arguments: Dict[str, Any]) -> List[TextConten
     
     return [TextContent(
         type="text",
-        text=json.dumps(result, indent=2)
+        text=_json_dumps(result).decode()
     )]
 
 
 async def handle_search_tool(arguments: Dict[str, Any]) -> List[TextContent]:
     """Handle search tool"""
     
-    query = arguments.get("query")
-    max_results = arguments.get("max_results", 10)
-    user_token = arguments.get("user_token")
-    
-    if not query:
-        return [TextContent(
-            type="text",
-            text="Error: Query parameter is required"
-        )]
-    
-    if not user_token:
-        return [TextContent(
-            type="text",
-            text="Error: User token is required for authentication"
-        )]
+    get = arguments.get
+    if not (query := get("query")):
+        return [_ERR_QUERY_REQUIRED]
+    if not (user_token := get("user_token")):
+        return [_ERR_TOKEN_REQUIRED]
+    max_results = get("max_results", 10)
     
     try:
         # Get user context
-        if user_token not in authenticated_users:
-            # Try to authenticate with the token
-            if descope_auth.enabled:
-                descope_user = await descope_auth.verify_token(user_token)
-                if not descope_user:
-                    return [TextContent(
-                        type="text",
-                        text="Error: Invalid authentication token"
-                    )]
-                
-                user_context = UserContext(
-                    user_id=descope_user.user_id,
-                    email=descope_user.email,
-                    access_token=user_token,
-                    scopes=["drive.readonly"],
-                    permissions={"google_drive": True}
-                )
-                authenticated_users[user_token] = user_context
-            else:
-                # Mock user for development
-                user_context = UserContext(
-                    user_id="mock_user",
-                    email="mock@example.com",
-                    access_token=user_token,
-                    scopes=["drive.readonly"],
-                    permissions={"google_drive": True}
-                )
-                authenticated_users[user_token] = user_context
-        else:
-            user_context = authenticated_users[user_token]
+        user_context = await resolve_user(user_token)
+        if user_context is None:
+            return [_ERR_INVALID_TOKEN]
+        request_user.set(user_context.email)
         
         # Initialize Google Drive adapter
-        drive_adapter = GoogleDriveAdapter(user_context)
+        drive_adapter = get_drive_adapter(user_context)
         
         # Perform search
         results = await drive_adapter.search(
@@ -559,19 +855,19 @@ async def handle_search_tool(arguments: Dict[str, Any]) -> List[TextContent]:
         )
         
         # Format results
-        search_results = {
-            "query": query,
-            "total_results": len(results),
-            "results": [result.dict() for result in results]
-        }
+        search_results = (
+            b'{"query":' + _json_dumps(query)
+            + b',"total_results":' + str(len(results)).encode()
+            + b',"results":' + _SEARCH_RESULTS_ADAPTER.dump_json(results) + b"}"
+        )
         
         return [TextContent(
             type="text",
-            text=json.dumps(search_results, indent=2)
+            text=search_results.decode()
         )]
         
     except Exception as e:
-        logger.error(f"Search failed: {e}")
+        logger.error("Search failed: {}", e)
         return [TextContent(
             type="text",
             text=f"Search failed: {str(e)}"
@@ -581,90 +877,53 @@ async def handle_search_tool(arguments: Dict[str, Any]) -> List[TextContent]:
 async def handle_document_tool(arguments: Dict[str, Any]) -> List[TextContent]:
     """Handle document content tool"""
     
-    document_id = arguments.get("document_id")
-    user_token = arguments.get("user_token")
-    
-    if not document_id:
-        return [TextContent(
-            type="text",
-            text="Error: Document ID is required"
-        )]
-    
-    if not user_token:
-        return [TextContent(
-            type="text",
-            text="Error: User token is required for authentication"
-        )]
+    get = arguments.get
+    if not (document_id := get("document_id")):
+        return [_ERR_DOCUMENT_ID_REQUIRED]
+    if not (user_token := get("user_token")):
+        return [_ERR_TOKEN_REQUIRED]
     
     try:
         # Get user context
-        if user_token not in authenticated_users:
-            # Try to authenticate with the token
-            if descope_auth.enabled:
-                descope_user = await descope_auth.verify_token(user_token)
-                if not descope_user:
-                    return [TextContent(
-                        type="text",
-                        text="Error: Invalid authentication token"
-                    )]
-                
-                user_context = UserContext(
-                    user_id=descope_user.user_id,
-                    email=descope_user.email,
-                    access_token=user_token,
-                    scopes=["drive.readonly"],
-                    permissions={"google_drive": True}
-                )
-                authenticated_users[user_token] = user_context
-            else:
-                # Mock user for development
-                user_context = UserContext(
-                    user_id="mock_user",
-                    email="mock@example.com",
-                    access_token=user_token,
-                    scopes=["drive.readonly"],
-                    permissions={"google_drive": True}
-                )
-                authenticated_users[user_token] = user_context
-        else:
-            user_context = authenticated_users[user_token]
+        user_context = await resolve_user(user_token)
+        if user_context is None:
+            return [_ERR_INVALID_TOKEN]
+        request_user.set(user_context.email)
         
         # Initialize Google Drive adapter
-        drive_adapter = GoogleDriveAdapter(user_context)
+        drive_adapter = get_drive_adapter(user_context)
         
         # Get document content
         document = await drive_adapter.get_document(document_id)
         
         return [TextContent(
             type="text",
-            text=json.dumps(document.dict(), indent=2)
+            text=document.model_dump_json()
         )]
         
     except Exception as e:
-        logger.error(f"Document retrieval failed: {e}")
+        logger.error("Document retrieval failed: {}", e)
         return [TextContent(
             type="text",
             text=f"Document retrieval failed: {str(e)}"
         )]
 
 
+# Tool name -> handler, shared by the MCP server and the HTTP tool endpoints
+_TOOL_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[List[TextContent]]]] = {
+    "authenticate_user": handle_authenticate_tool,
+    "search_workplace": handle_search_tool,
+    "get_document_content": handle_document_tool,
+}
+
+
 # MCP over HTTP endpoints for remote access
 @app.post("/mcp/tools")
 async def list_mcp_tools(request: Request):
     """List available MCP tools via HTTP"""
     await security_check(request)
     
-    tools = await handle_list_tools()
-    return {
-        "tools": [
-            {
-                "name": tool.name,
-                "description": tool.description,
-                "inputSchema": tool.inputSchema
-            }
-            for tool in tools
-        ]
-    }
+    return Response(content=_TOOLS_JSON, media_type="application/json")
 
 
 @app.post("/mcp/call-tool")
@@ -676,10 +935,7 @@ async def call_mcp_tool(request: Request, tool_request: dict):
     arguments = tool_request.get("arguments", {})
     
     if not tool_name:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Tool name is required"
-        )
+        raise _EXC_TOOL_NAME_REQUIRED.with_traceback(None)
     
     try:
         result = await handle_call_tool(tool_name, arguments)
@@ -689,34 +945,79 @@ async def call_mcp_tool(request: Request, tool_request: dict):
             "tool_name": tool_name
         }
     except Exception as e:
-        logger.error(f"Tool call failed: {e}")
+        logger.error("Tool call failed: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Tool execution failed: {str(e)}"
         )
 
 
+@app.post("/mcp/call-tool-batch")
+async def call_mcp_tool_batch(request: Request, batch_request: ToolBatchRequest):
+    """Call several MCP tools via one HTTP request"""
+    await security_check(request)
+    
+    # The security check charged one request; every further call costs one more
+    calls = batch_request.calls
+    if len(calls) > 1:
+        await get_gateway(request).charge_rate_limit(request, len(calls) - 1)
+    
+    outcomes = await asyncio.gather(
+        *(handle_call_tool(call.name, call.arguments) for call in calls),
+        return_exceptions=True
+    )
+    
+    results = []
+    for call, outcome in zip(calls, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("Tool call failed: {}", outcome)
+            results.append({
+                "success": False,
+                "error": f"Tool execution failed: {str(outcome)}",
+                "tool_name": call.name
+            })
+        else:
+            results.append({
+                "success": True,
+                "result": [content.text for content in outcome],
+                "tool_name": call.name
+            })
+    
+    return {"results": results}
+
+
+# Server information never changes, so it is encoded once
+_MCP_INFO_JSON: bytes = _json_dumps({
+    "name": "workplace-search-mcp",
+    "version": "1.0.0",
+    "description": "Workplace Search MCP Server with Descope auth and Google Drive",
+    "capabilities": {
+        "tools": True,
+        "authentication": True,
+        "security": True
+    },
+    "endpoints": {
+        "tools": "/mcp/tools",
+        "call_tool": "/mcp/call-tool",
+        "auth": "/auth/login",
+        "search": "/search",
+        "document": "/document",
+        "health": "/health"
+    }
+})
+
+
+# Validators for the fixed body, so clients can revalidate with a bodyless 304
+_MCP_INFO_ETAG = f'"{hashlib.blake2b(_MCP_INFO_JSON, digest_size=16).hexdigest()}"'
+_MCP_INFO_HEADERS = {"ETag": _MCP_INFO_ETAG, "Cache-Control": "public, max-age=3600"}
+
+
 @app.get("/mcp/info")
-async def get_mcp_info():
+async def get_mcp_info(request: Request):
     """Get MCP server information"""
-    return {
-        "name": "workplace-search-mcp",
-        "version": "1.0.0",
-        "description": "Workplace Search MCP Server with Descope auth and Google Drive",
-        "capabilities": {
-            "tools": True,
-            "authentication": True,
-            "security": True
-        },
-        "endpoints": {
-            "tools": "/mcp/tools",
-            "call_tool": "/mcp/call-tool",
-            "auth": "/auth/login",
-            "search": "/search",
-            "document": "/document",
-            "health": "/health"
-        }
-    }
+    if request.headers.get("if-none-match") == _MCP_INFO_ETAG:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_MCP_INFO_HEADERS)
+    return Response(content=_MCP_INFO_JSON, media_type="application/json", headers=_MCP_INFO_HEADERS)
 
 
 if __name__ == "__main__":
@@ -724,13 +1025,18 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     
-    logger.info(f"Starting Workplace Search MCP HTTP Server on {host}:{port}")
+    logger.info("Starting Workplace Search MCP HTTP Server on {}:{}", host, port)
     logger.info("Server will be accessible via HTTP endpoints for remote Claude access")
     
+    # uvloop and httptools come with uvicorn[standard] but uvloop has no Windows build
     uvicorn.run(
-        app, 
-        host=host, 
+        "app.remote_mcp_server:app",
+        host=host,
         port=port,
         reload=False,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        access_log=False,
         log_level=os.getenv("LOG_LEVEL", "info").lower()
     )
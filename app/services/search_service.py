@@ -1,14 +1,11 @@
 from typing import List, Dict, Any
 import os
-import hashlib
+import asyncio
+import heapq
+import importlib
 from app.models.models import UserContext, DocumentSource, SearchResult, DocumentContent, SummaryResult, RecentUpdate, SourceDocument
 from app.utils.logger import logger
-from app.utils.auth import has_required_scopes
-from app.adapters.google_drive_adapter import GoogleDriveAdapter
-from app.adapters.notion_adapter import NotionAdapter
-from app.adapters.slack_adapter import SlackAdapter
-from app.adapters.confluence_adapter import ConfluenceAdapter
-from cachetools import TTLCache
+from cachetools import TLRUCache, TTLCache
 
 # Cache settings from environment
 CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
@@ -16,15 +13,50 @@ SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
 DOCUMENT_CACHE_TTL = int(os.getenv("DOCUMENT_CACHE_TTL", "600"))
 UPDATES_CACHE_TTL = int(os.getenv("UPDATES_CACHE_TTL", "300"))
 
-# Cache for search results
-search_cache = TTLCache(maxsize=100, ttl=SEARCH_CACHE_TTL)
-document_cache = TTLCache(maxsize=100, ttl=DOCUMENT_CACHE_TTL)
-update_cache = TTLCache(maxsize=50, ttl=UPDATES_CACHE_TTL)
+# One cache for search, summary and update results; every key starts with its
+# kind, which picks the entry's TTL, so a single structure does the expiry work
+_CACHE_TTLS = {
+    "search": SEARCH_CACHE_TTL,
+    "summarize": DOCUMENT_CACHE_TTL,
+    "updates": UPDATES_CACHE_TTL
+}
+result_cache = TLRUCache(maxsize=250, ttu=lambda key, _value, now: now + _CACHE_TTLS[key[0]])
 
-def _get_cache_key(prefix, *args):
-    """Generate a unique cache key based on provided arguments"""
-    key_string = prefix + ":" + ":".join(str(arg) for arg in args)
-    return hashlib.md5(key_string.encode()).hexdigest()
+# String forms of each source, built once; scopes are named by the source value
+_SOURCE_STR = {source: str(source) for source in DocumentSource}
+_SOURCE_READ_SCOPE = {source: f"{source.value}:read" for source in DocumentSource}
+
+# Adapters per user
+_adapter_cache = TTLCache(maxsize=1000, ttl=600)
+
+# Adapter classes by source, imported on first use so disabled sources never
+# load their SDKs. Notion, Slack and Confluence have no adapters yet.
+_ADAPTER_PATHS = {
+    DocumentSource.gdrive: ("app.adapters.google_drive_adapter", "GoogleDriveAdapter"),
+}
+_adapter_classes: Dict[DocumentSource, type] = {}
+
+def _adapter_class(source: DocumentSource) -> type:
+    """Import and remember the adapter class for a source"""
+    cls = _adapter_classes.get(source)
+    if cls is None:
+        module_name, class_name = _ADAPTER_PATHS[source]
+        cls = getattr(importlib.import_module(module_name), class_name)
+        _adapter_classes[source] = cls
+    return cls
+
+def _readable_sources(sources, user_context: UserContext) -> list:
+    """Filter sources down to those the user has read scope for, warning about the rest"""
+    granted = user_context.scope_set
+    readable = []
+    for source in sources:
+        # str-valued sources from document IDs hash equal to their enum members
+        scope = _SOURCE_READ_SCOPE.get(source) or f"{source}:read"
+        if scope in granted:
+            readable.append(source)
+        else:
+            logger.warning(f"User doesn't have permission to access {source}")
+    return readable
 
 async def search_documents(
     query: str,
@@ -35,16 +67,16 @@ async def search_documents(
     """
     Search documents across multiple sources.
     """
-    # Generate cache key
-    cache_key = _get_cache_key("search", query, ",".join(sorted([str(s) for s in sources])), 
-                             max_results, user_context.user_id)
-    
-    # Check if result in cache
-    if CACHE_ENABLED and cache_key in search_cache:
-        logger.info(f"Returning cached results for query: '{query}'")
-        return search_cache[cache_key]
+    # Generate cache key only when caching; tuples of primitives hash natively
+    cache_key = None
+    if CACHE_ENABLED:
+        cache_key = ("search", query, tuple(sorted(_SOURCE_STR[source] for source in sources)), max_results, user_context.user_id)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached results for query: '{query}'")
+            return list(cached)
         
-    logger.info(f"Searching for '{query}' in sources: {', '.join(str(s) for s in sources)}")
+    logger.info(f"Searching for '{query}' in sources: {', '.join(_SOURCE_STR[s] for s in sources)}")
     
     if not user_context.authenticated:
         raise Exception("User is not authenticated")
@@ -55,31 +87,31 @@ async def search_documents(
     # Collect results from all requested sources
     results: List[SearchResult] = []
     
-    # Check permissions and search each source
-    for source in sources:
-        required_scope = f"{source}:read"
-        
-        if not has_required_scopes(user_context, [required_scope]):
-            logger.warning(f"User doesn't have permission to access {source}")
+    # Check permissions, then search every permitted source concurrently
+    searched_sources = []
+    searches = []
+    for source in _readable_sources(sources, user_context):
+        adapter = adapters.get(source)
+        if not adapter:
+            logger.warning(f"No adapter available for {source}")
             continue
         
-        try:
-            adapter = adapters.get(source)
-            if not adapter:
-                logger.warning(f"No adapter available for {source}")
-                continue
-            
-            source_results = await adapter.search(query, max_results)
-            results.extend(source_results)
-        except Exception as e:
-            logger.error(f"Error searching {source}: {e}")
+        searched_sources.append(source)
+        searches.append(adapter.search(query, max_results))
+    
+    outcomes = await asyncio.gather(*searches, return_exceptions=True)
+    for source, outcome in zip(searched_sources, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error searching {source}: {outcome}")
+        else:
+            results.extend(outcome)
     
     # Sort by relevance (adapter-specific) and limit results
     results = results[:max_results]
     
-    # Store in cache
-    if CACHE_ENABLED:
-        search_cache[cache_key] = results
+    # Store in cache as a tuple so callers can't mutate the shared entry
+    if cache_key is not None:
+        result_cache[cache_key] = tuple(results)
     
     return results
 
@@ -91,14 +123,14 @@ async def summarize_content(
     """
     Summarize content from multiple documents.
     """
-    # Generate cache key
-    cache_key = _get_cache_key("summarize", ",".join(sorted(document_ids)), 
-                             max_length, user_context.user_id)
-                             
-    # Check if result in cache
-    if CACHE_ENABLED and cache_key in document_cache:
-        logger.info(f"Returning cached summary for documents: {document_ids}")
-        return document_cache[cache_key]
+    # Generate cache key only when caching
+    cache_key = None
+    if CACHE_ENABLED:
+        cache_key = ("summarize", tuple(sorted(document_ids)), max_length, user_context.user_id)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached summary for documents: {document_ids}")
+            return cached
     
     logger.info(f"Summarizing {len(document_ids)} documents")
     
@@ -111,6 +143,8 @@ async def summarize_content(
     # Fetch document content from appropriate sources
     documents: List[DocumentContent] = []
     
+    # Group document IDs by source so each adapter is called once
+    ids_by_source: Dict[str, List[str]] = {}
     for doc_id in document_ids:
         # Parse document ID to determine the source
         # Format: source:id (e.g., gdrive:1234, notion:5678)
@@ -118,33 +152,35 @@ async def summarize_content(
         if len(parts) != 2:
             logger.warning(f"Invalid document ID format: {doc_id}")
             continue
-        
-        source, doc_id = parts
-        
-        required_scope = f"{source}:read"
-        
-        if not has_required_scopes(user_context, [required_scope]):
-            logger.warning(f"User doesn't have permission to access {source}")
+        ids_by_source.setdefault(parts[0], []).append(parts[1])
+    
+    fetched_sources = []
+    fetches = []
+    # Permissions are checked once per distinct source, not once per document
+    for source in _readable_sources(ids_by_source, user_context):
+        adapter = adapters.get(source)
+        if not adapter:
+            logger.warning(f"No adapter available for {source}")
             continue
         
-        try:
-            adapter = adapters.get(source)
-            if not adapter:
-                logger.warning(f"No adapter available for {source}")
-                continue
-            
-            document = await adapter.get_document(doc_id)
-            documents.append(document)
-        except Exception as e:
-            logger.error(f"Error fetching document {doc_id}: {e}")
+        fetched_sources.append(source)
+        fetches.append(adapter.get_documents(ids_by_source[source]))
+    
+    # Sources are fetched concurrently; documents stay in request order within each source
+    outcomes = await asyncio.gather(*fetches, return_exceptions=True)
+    for source, outcome in zip(fetched_sources, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error fetching documents from {source}: {outcome}")
+        else:
+            documents.extend(outcome)
     
     # Generate summary using collected documents
     # In a real implementation, this might use an LLM or other summarization service
     summary = generate_summary(documents, max_length)
     
     # Store in cache
-    if CACHE_ENABLED:
-        document_cache[cache_key] = summary
+    if cache_key is not None:
+        result_cache[cache_key] = summary
     
     return summary
 
@@ -157,16 +193,16 @@ async def get_recent_updates(
     """
     Get recent updates from multiple sources.
     """
-    # Generate cache key
-    cache_key = _get_cache_key("updates", ",".join(sorted([str(s) for s in sources])), 
-                             days, max_results, user_context.user_id)
-                             
-    # Check if result in cache
-    if CACHE_ENABLED and cache_key in update_cache:
-        logger.info(f"Returning cached updates for last {days} days")
-        return update_cache[cache_key]
+    # Generate cache key only when caching
+    cache_key = None
+    if CACHE_ENABLED:
+        cache_key = ("updates", tuple(sorted(_SOURCE_STR[source] for source in sources)), days, max_results, user_context.user_id)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached updates for last {days} days")
+            return list(cached)
     
-    logger.info(f"Getting updates from the last {days} days from sources: {', '.join(str(s) for s in sources)}")
+    logger.info(f"Getting updates from the last {days} days from sources: {', '.join(_SOURCE_STR[s] for s in sources)}")
     
     if not user_context.authenticated:
         raise Exception("User is not authenticated")
@@ -177,50 +213,45 @@ async def get_recent_updates(
     # Collect updates from all requested sources
     updates: List[RecentUpdate] = []
     
-    # Check permissions and get updates from each source
-    for source in sources:
-        required_scope = f"{source}:read"
-        
-        if not has_required_scopes(user_context, [required_scope]):
-            logger.warning(f"User doesn't have permission to access {source}")
+    # Check permissions, then query every permitted source concurrently
+    queried_sources = []
+    queries = []
+    for source in _readable_sources(sources, user_context):
+        adapter = adapters.get(source)
+        if not adapter:
+            logger.warning(f"No adapter available for {source}")
             continue
         
-        try:
-            adapter = adapters.get(source)
-            if not adapter:
-                logger.warning(f"No adapter available for {source}")
-                continue
-            
-            source_updates = await adapter.get_recent_updates(days)
-            updates.extend(source_updates)
-        except Exception as e:
-            logger.error(f"Error getting updates from {source}: {e}")
-    
-    # Sort by date (newest first) and limit results
-    sorted_updates = sorted(
-        updates,
-        key=lambda x: x.last_modified,
-        reverse=True
-    )
+        queried_sources.append(source)
+        queries.append(adapter.get_recent_updates(days))
     
-    result = sorted_updates[:max_results]
+    outcomes = await asyncio.gather(*queries, return_exceptions=True)
+    for source, outcome in zip(queried_sources, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error getting updates from {source}: {outcome}")
+        else:
+            updates.extend(outcome)
     
-    # Store in cache
-    if CACHE_ENABLED:
-        update_cache[cache_key] = result
+    # Newest first, keeping only the top results rather than sorting them all
+    result = heapq.nlargest(max_results, updates, key=lambda x: x.last_modified)
+    
+    # Store in cache as a tuple so callers can't mutate the shared entry
+    if cache_key is not None:
+        result_cache[cache_key] = tuple(result)
     
     return result
 
 def initialize_adapters(user_context: UserContext) -> Dict[str, Any]:
     """
     Initialize adapters for different sources.
+    
+    Adapters are reused per user so loaded credentials survive between calls.
     """
-    return {
-        DocumentSource.gdrive: GoogleDriveAdapter(user_context),
-        # DocumentSource.notion: NotionAdapter(user_context),
-        # DocumentSource.slack: SlackAdapter(user_context),
-        # DocumentSource.confluence: ConfluenceAdapter(user_context)
-    }
+    adapters = _adapter_cache.get(user_context.user_id)
+    if adapters is None:
+        adapters = {source: _adapter_class(source)(user_context) for source in _ADAPTER_PATHS}
+        _adapter_cache[user_context.user_id] = adapters
+    return adapters
 
 def generate_summary(documents: List[DocumentContent], max_length: int) -> SummaryResult:
     """
@@ -228,9 +259,18 @@ def generate_summary(documents: List[DocumentContent], max_length: int) -> Summa
     
     In a real implementation, this would use an LLM or other summarization service.
     """
-    # This is a simple placeholder implementation
-    combined_text = " ".join(doc.content for doc in documents)
-    truncated_summary = combined_text[:max_length]
+    # This is a simple placeholder implementation; only the first max_length
+    # characters of the space-joined content are ever copied
+    parts = []
+    remaining = max_length
+    for doc in documents:
+        # At zero the separator before the next document still counts
+        if remaining < 0:
+            break
+        part = doc.content[:remaining]
+        parts.append(part)
+        remaining -= len(part) + 1
+    truncated_summary = " ".join(parts)[:max_length]
     
     return SummaryResult(
         summary=truncated_summary,
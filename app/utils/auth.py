@@ -1,23 +1,74 @@
 import os
+import time
+import hashlib
 import httpx
+import jwt
+from cachetools import TLRUCache
 from app.utils.logger import logger
 from app.models.models import UserContext
 import json
 from typing import Dict, Any, Optional
 
+# Configuration is fixed for the life of the process, so it is read once
+_AUTH_ENABLED = os.getenv("AUTH_ENABLED", "false").lower() == "true"
+_CEQUENCE_ENABLED = os.getenv("CEQUENCE_ENABLED", "false").lower() == "true"
+_CEQUENCE_API_KEY = os.getenv("CEQUENCE_API_KEY")
+_DESCOPE_CLIENT_CONFIG = {
+    "base_url": os.getenv("DESCOPE_BASE_URL", "https://api.descope.com"),
+    "project_id": os.getenv("DESCOPE_PROJECT_ID", ""),
+    "api_key": os.getenv("DESCOPE_API_KEY", "")
+}
+
+# Descope session JWTs are far longer than this; anything shorter is not worth a round-trip
+_MIN_TOKEN_LENGTH = 16
+
+# Recent successful validations by token digest; each entry is (result, expires_at)
+# and is reused for at most a minute, never past the token's own expiry
+_VALIDATION_CACHE_TTL = 60
+_validation_cache = TLRUCache(
+    maxsize=10_000,
+    ttu=lambda _key, entry, _now: entry[1],
+    timer=time.time
+)
+
+def _token_expiry(token: str, result: dict) -> Optional[float]:
+    """Expiry of a validated token, from Descope's response or the JWT's own exp claim"""
+    exp = result.get("exp")
+    if exp is None:
+        try:
+            # Descope has already verified the token; only the claim is read here
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            return None
+    return float(exp) if exp is not None else None
+
+# Shared client for Descope validation calls, so connections are kept alive
+_descope_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_descope_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for Descope calls, created on first use"""
+    global _descope_http_client
+    if _descope_http_client is None or _descope_http_client.is_closed:
+        _descope_http_client = httpx.AsyncClient(
+            timeout=5.0,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+    return _descope_http_client
+
+async def close_descope_http_client():
+    """Close the shared Descope client; call once when the process shuts down"""
+    global _descope_http_client
+    if _descope_http_client is not None:
+        await _descope_http_client.aclose()
+        _descope_http_client = None
+
 def get_descope_client():
     """
     Get a configured Descope client.
     In a real implementation, this would use the Descope SDK.
     """
-    descope_base_url = os.getenv("DESCOPE_BASE_URL", "https://api.descope.com")
-    descope_project_id = os.getenv("DESCOPE_PROJECT_ID", "")
-    
-    return {
-        "base_url": descope_base_url,
-        "project_id": descope_project_id,
-        "api_key": os.getenv("DESCOPE_API_KEY", "")
-    }
+    return _DESCOPE_CLIENT_CONFIG
 
 async def authenticate_user(auth_token: str) -> UserContext:
     """
@@ -28,11 +79,12 @@ async def authenticate_user(auth_token: str) -> UserContext:
     try:
         if not auth_token:
             logger.warning("No auth token provided")
-            auth_token="auth"
-            # return UserContext(authenticated=False, access_scopes=[])
         
         # Check if authentication is enabled
-        if os.getenv("AUTH_ENABLED", "false").lower() == "true":
+        if _AUTH_ENABLED:
+            if not auth_token or len(auth_token) < _MIN_TOKEN_LENGTH:
+                return UserContext(authenticated=False, user_id="", email="", scopes=[])
+            
             try:
                 # Validate token with Descope
                 descope_client = get_descope_client()
@@ -42,13 +94,13 @@ async def authenticate_user(auth_token: str) -> UserContext:
                     authenticated=True,
                     user_id=response.get("userId"),
                     email=response.get("email"),
-                    name=response.get("name"),
-                    access_scopes=response.get("scopes", []),
+                    scopes=response.get("scopes", []),
+                    metadata={"name": response.get("name")},
                     access_token=auth_token
                 )
             except Exception as e:
                 logger.error(f"Auth validation failed: {e}")
-                return UserContext(authenticated=False, access_scopes=[])
+                return UserContext(authenticated=False, user_id="", email="", scopes=[])
         else:
             # For development: mock a successful authentication
             logger.info("Auth is disabled, using mock authentication")
@@ -56,13 +108,13 @@ async def authenticate_user(auth_token: str) -> UserContext:
                 authenticated=True,
                 user_id="mock-user-id",
                 email="user@example.com",
-                name="Test User",
-                access_scopes=["gdrive:read", "notion:read", "slack:read", "confluence:read"],
+                scopes=["gdrive:read", "notion:read", "slack:read", "confluence:read"],
+                metadata={"name": "Test User"},
                 access_token=auth_token
             )
     except Exception as e:
         logger.error(f"Error in auth middleware: {e}")
-        return UserContext(authenticated=False, access_scopes=[])
+        return UserContext(authenticated=False, user_id="", email="", scopes=[])
 
 async def validate_with_descope(descope_client: Dict[str, str], token: str) -> dict:
     """
@@ -70,26 +122,39 @@ async def validate_with_descope(descope_client: Dict[str, str], token: str) -> d
     
     In a real implementation, this would call the Descope API.
     """
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = _validation_cache.get(cache_key)
+    if cached is not None:
+        return cached[0]
+    
     try:
         base_url = descope_client.get("base_url")
         project_id = descope_client.get("project_id")
         api_key = descope_client.get("api_key")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{base_url}/v1/auth/validate",
-                json={
-                    "projectId": project_id,
-                    "token": token
-                },
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {api_key}"
-                }
-            )
-            
-            response.raise_for_status()
-            return response.json()
+        response = await _get_descope_http_client().post(
+            f"{base_url}/v1/auth/validate",
+            json={
+                "projectId": project_id,
+                "token": token
+            },
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}"
+            }
+        )
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        now = time.time()
+        expires_at = now + _VALIDATION_CACHE_TTL
+        token_expiry = _token_expiry(token, result)
+        if token_expiry is not None:
+            expires_at = min(expires_at, token_expiry)
+        if expires_at > now:
+            _validation_cache[cache_key] = (result, expires_at)
+        return result
     except Exception as e:
         logger.error(f"Descope validation error: {e}")
         raise Exception("Token validation failed")
@@ -101,7 +166,7 @@ def has_required_scopes(user_context: UserContext, required_scopes: list) -> boo
     if not user_context.authenticated:
         return False
     
-    return all(scope in user_context.access_scopes for scope in required_scopes)
+    return user_context.scope_set.issuperset(required_scopes)
 
 def secure_mcp_request(request: dict, user_context: UserContext) -> dict:
     """
@@ -110,12 +175,12 @@ def secure_mcp_request(request: dict, user_context: UserContext) -> dict:
     In a real implementation, this would add Cequence security headers or modify the request.
     """
     # Check if Cequence is enabled
-    if os.getenv("CEQUENCE_ENABLED", "false").lower() == "true":
+    if _CEQUENCE_ENABLED:
         # Add Cequence security headers to the request
         headers = request.get("headers", {})
         headers.update({
             "X-Cequence-MCP-User-ID": user_context.user_id,
-            "X-Cequence-MCP-Token": os.getenv("CEQUENCE_API_KEY")
+            "X-Cequence-MCP-Token": _CEQUENCE_API_KEY
         })
         request["headers"] = headers
     
@@ -0,0 +1,54 @@
+"""
+Process environment setup shared by the server entry points
+"""
+
+import functools
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+# Used when neither the process environment nor .env sets a value
+_DEFAULTS = {
+    "GOOGLE_DRIVE_PRODUCTION": "true",
+    "LOG_LEVEL": "INFO",
+    "PORT": "8000",
+    "HOST": "0.0.0.0",
+}
+
+
+@functools.lru_cache(maxsize=1)
+def setup_environment():
+    """Load .env and fill in defaults, once per process; real env vars always win"""
+    values = dict(_DEFAULTS)
+
+    env_file = Path(".env")
+    if env_file.exists():
+        from dotenv import dotenv_values
+        values.update((key, value) for key, value in dotenv_values(env_file).items() if value is not None)
+
+    os.environ.update({key: value for key, value in values.items() if key not in os.environ})
+
+
+@dataclass(frozen=True, slots=True)
+class ServerConfig:
+    """HTTP server settings, read from the environment once at startup"""
+    host: str
+    port: int
+    log_level: str
+    workers: int
+
+    @classmethod
+    def from_env(cls) -> "ServerConfig":
+        return cls(
+            host=os.getenv("HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", "8000")),
+            log_level=os.getenv("LOG_LEVEL", "info").lower(),
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_server_config() -> ServerConfig:
+    """Snapshot the server settings, after .env and the defaults are applied"""
+    setup_environment()
+    return ServerConfig.from_env()
@@ -0,0 +1,46 @@
+"""
+Shared HTTP clients for calls to the remote MCP server
+"""
+
+from typing import Dict, Tuple
+
+import httpx
+
+from app.utils.logger import logger
+
+
+# Pooled clients keyed by (base_url, token), shared by every caller
+_mcp_http_clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+
+
+def get_mcp_http_client(base_url: str, token: str = "") -> httpx.AsyncClient:
+    """Get the pooled HTTP client for a remote MCP server, created on first use"""
+    client = _mcp_http_clients.get((base_url, token))
+    if client is None or client.is_closed:
+        # Built once as an httpx.Headers so every request reuses the encoded values
+        headers = httpx.Headers({"Content-Type": "application/json"})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        logger.debug(f"Creating pooled HTTP client for {base_url}")
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=30.0,
+            headers=headers,
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=100,
+                max_connections=200,
+                keepalive_expiry=30.0
+            )
+        )
+        _mcp_http_clients[(base_url, token)] = client
+    return client
+
+
+async def close_mcp_http_clients():
+    """Close every pooled MCP client; call once when the process shuts down"""
+    clients = list(_mcp_http_clients.values())
+    _mcp_http_clients.clear()
+    for client in clients:
+        await client.aclose()
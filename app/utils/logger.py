@@ -3,6 +3,11 @@ import sys
 from loguru import logger
 from typing import Dict, Any
 import os
+from contextvars import ContextVar
+
+
+# Email of the user the current request acts for; stamped on every log record
+request_user: ContextVar[str] = ContextVar("request_user", default="-")
 
 
 class InterceptHandler(logging.Handler):
@@ -26,20 +31,26 @@ class InterceptHandler(logging.Handler):
         )
 
 
+# Extended tracebacks for the console sink, off unless explicitly enabled
+_LOG_BACKTRACE = os.getenv("LOG_BACKTRACE", "false").lower() == "true"
+_LOG_DIAGNOSE = os.getenv("LOG_DIAGNOSE", "false").lower() == "true"
+
+
 def setup_logging(level: str = "INFO", log_file: str = None):
     """Setup logging configuration"""
     
     # Remove default handler
     logger.remove()
+    logger.configure(patcher=lambda record: record["extra"].setdefault("user", request_user.get()))
     
     # Add console handler
     logger.add(
         sys.stderr,
         level=level,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | {extra[user]} - <level>{message}</level>",
         colorize=True,
-        backtrace=True,
-        diagnose=True
+        backtrace=_LOG_BACKTRACE,
+        diagnose=_LOG_DIAGNOSE
     )
     
     # Add file handler if specified
@@ -47,10 +58,12 @@ def setup_logging(level: str = "INFO", log_file: str = None):
         logger.add(
             log_file,
             level=level,
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {extra[user]} - {message}",
             rotation="10 MB",
             retention="1 week",
-            compression="zip"
+            compression="zip",
+            # Format and write on loguru's worker thread, not the event loop
+            enqueue=True
         )
     
     # Intercept standard logging
@@ -71,4 +84,4 @@ log_file = os.getenv("LOG_FILE")
 setup_logging(log_level, log_file)
 
 # Export logger instance
-__all__ = ["logger"]
+__all__ = ["logger", "request_user"]
@@ -0,0 +1,17 @@
+"""
+Helpers for the static JSON schemas of MCP tools
+"""
+
+import sys
+from typing import Any
+
+
+def intern_tree(node: Any) -> Any:
+    """Intern every string key and short string value in a JSON-like tree"""
+    if isinstance(node, dict):
+        return {sys.intern(key): intern_tree(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [intern_tree(item) for item in node]
+    if isinstance(node, str) and len(node) <= 64:
+        return sys.intern(node)
+    return node
@@ -8,46 +8,37 @@ This script can run the server in different modes:
 """
 
 import sys
-import os
 import asyncio
 import argparse
+import importlib.util
 from pathlib import Path
 
 # Add the app directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from app.utils.env import get_server_config
 from app.utils.logger import logger
 
 
-def setup_environment():
-    """Setup environment variables"""
-    # Load .env file if it exists
-    env_file = Path(".env")
-    if env_file.exists():
-        from dotenv import load_dotenv
-        load_dotenv(env_file)
-    
-    # Set default values
-    os.environ.setdefault("GOOGLE_DRIVE_PRODUCTION", "true")
-    os.environ.setdefault("LOG_LEVEL", "INFO")
-    os.environ.setdefault("PORT", "8000")
-
-
 def run_remote_mcp_server():
     """Run the remote MCP server"""
     logger.info("Starting Enhanced Remote Google Drive MCP Server...")
     
     import uvicorn
-    from app.remote_mcp_server import app
     
-    port = int(os.getenv("PORT", 8000))
-    host = os.getenv("HOST", "0.0.0.0")
+    config = get_server_config()
     
+    # Passed as an import string so uvicorn can start several workers;
+    # uvloop and httptools come with uvicorn[standard] but uvloop has no Windows build
     uvicorn.run(
-        app,
-        host=host,
-        port=port,
-        log_level=os.getenv("LOG_LEVEL", "info").lower()
+        "app.remote_mcp_server:app",
+        host=config.host,
+        port=config.port,
+        workers=config.workers,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        access_log=False,
+        log_level=config.log_level
     )
 
 
@@ -63,7 +54,7 @@ def main():
     args = parser.parse_args()
     
     # Setup environment
-    setup_environment()
+    get_server_config()
     
     if args.setup_oauth:
         # Run OAuth setup
@@ -1,8 +1,11 @@
 # MCP stdio server for Workplace Search Agent
 import asyncio
-from typing import List, Optional
+import functools
+from contextlib import asynccontextmanager
+from typing import List, Optional, Sequence, Tuple
 
 from mcp.server.fastmcp import FastMCP
+from pydantic import TypeAdapter
 
 # Reuse existing app logic
 from app.services.search_service import (
@@ -10,25 +13,50 @@ from app.services.search_service import (
     summarize_content as svc_summarize_content,
     get_recent_updates as svc_get_recent_updates,
 )
-from app.models.models import DocumentSource
-from app.utils.auth import authenticate_user
+from app.models.models import DocumentSource, RecentUpdate, SearchResult
+from app.adapters.google_drive_adapter import close_http_client
+from app.utils.auth import authenticate_user, close_descope_http_client
 from app.utils.logger import logger
 
-mcp = FastMCP("workplace-search")
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Close the pooled Drive and Descope clients that every tool call shares"""
+    try:
+        yield
+    finally:
+        await close_http_client()
+        await close_descope_http_client()
+
+
+mcp = FastMCP("workplace-search", lifespan=lifespan)
+
+# Direct value -> member lookup, skipping Enum.__call__ and its _missing_ hook
+_SOURCES_BY_VALUE = DocumentSource._value2member_map_
 
+# Serialize whole result lists in one pydantic-core pass per tool call
+_SEARCH_RESULTS_ADAPTER = TypeAdapter(List[SearchResult])
+_RECENT_UPDATES_ADAPTER = TypeAdapter(List[RecentUpdate])
 
-def _parse_sources(sources: Optional[List[str]]) -> List[DocumentSource]:
+# Sources searched when the caller names none; shared, so kept immutable
+_DEFAULT_SOURCES = (DocumentSource.gdrive,)
+
+
+def _parse_sources(sources: Optional[List[str]]) -> Sequence[DocumentSource]:
     if not sources:
-        return [
-            DocumentSource.gdrive,
-        ]
-    mapped: List[DocumentSource] = []
-    for s in sources:
-        try:
-            mapped.append(DocumentSource(s))
-        except Exception:
-            # Ignore unknown sources
-            logger.warning(f"Unknown source '{s}' ignored")
+        return _DEFAULT_SOURCES
+    return _parse_source_tuple(tuple(sources))
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_source_tuple(sources: Tuple[str, ...]) -> Tuple[DocumentSource, ...]:
+    # Clients send the same few source lists, so each is mapped once;
+    # an unknown source is therefore warned about once per distinct list
+    mapped = tuple(_SOURCES_BY_VALUE[s] for s in sources if s in _SOURCES_BY_VALUE)
+    if len(mapped) != len(sources):
+        # Ignore unknown sources, warning once for each
+        for s in dict.fromkeys(sources):
+            if s not in _SOURCES_BY_VALUE:
+                logger.warning(f"Unknown source '{s}' ignored")
     return mapped
 
 
@@ -40,15 +68,14 @@ async def search_documents(
     auth_token: Optional[str] = None,
 ):
     """Search for documents, messages, and knowledge base entries across multiple sources."""
-    user_context = await authenticate_user(auth_token or "auth")
+    user_context = await authenticate_user(auth_token or "")
     results = await svc_search_documents(
         query=query,
         sources=_parse_sources(sources),
         max_results=max_results,
         user_context=user_context,
     )
-    # Pydantic models are JSON-serializable via .model_dump() in v2
-    return {"results": [r.model_dump() for r in results]}
+    return {"results": _SEARCH_RESULTS_ADAPTER.dump_python(results)}
 
 
 @mcp.tool()
@@ -82,7 +109,7 @@ async def get_recent_updates(
         max_results=max_results,
         user_context=user_context,
     )
-    return {"updates": [u.model_dump() for u in updates]}
+    return {"updates": _RECENT_UPDATES_ADAPTER.dump_python(updates)}
 
 
 # Remove manual stdio plumbing; let FastMCP manage stdio
@@ -3,43 +3,31 @@
 Start the Workplace Search MCP HTTP Server
 """
 
-import os
 import sys
 import argparse
+import importlib.util
 from pathlib import Path
 
 # Add the app directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from app.utils.env import get_server_config
 from app.utils.logger import logger
 
 
-def setup_environment():
-    """Setup environment variables"""
-    # Load .env file if it exists
-    env_file = Path(".env")
-    if env_file.exists():
-        from dotenv import load_dotenv
-        load_dotenv(env_file)
-    
-    # Set default values
-    os.environ.setdefault("GOOGLE_DRIVE_PRODUCTION", "true")
-    os.environ.setdefault("LOG_LEVEL", "INFO")
-    os.environ.setdefault("PORT", "8000")
-    os.environ.setdefault("HOST", "0.0.0.0")
-
-
 def main():
     """Main entry point"""
+    # Read first so values from .env also serve as the CLI defaults
+    config = get_server_config()
+    
     parser = argparse.ArgumentParser(description="Workplace Search MCP HTTP Server")
-    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="Host to bind to")
-    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="Port to bind to")
+    parser.add_argument("--host", default=config.host, help="Host to bind to")
+    parser.add_argument("--port", type=int, default=config.port, help="Port to bind to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload for development")
+    parser.add_argument("--workers", type=int, default=config.workers, help="Number of worker processes")
     
     args = parser.parse_args()
     
-    setup_environment()
-    
     logger.info("Starting Workplace Search MCP HTTP Server...")
     logger.info(f"Server will be accessible at http://{args.host}:{args.port}")
     logger.info("Available endpoints:")
@@ -52,14 +40,19 @@ def main():
     logger.info("  - POST /document - Get document content")
     
     import uvicorn
-    from app.remote_mcp_server import app
     
+    # Passed as an import string so uvicorn can start several workers or reload;
+    # uvloop and httptools come with uvicorn[standard] but uvloop has no Windows build
     uvicorn.run(
-        app,
+        "app.remote_mcp_server:app",
         host=args.host,
         port=args.port,
         reload=args.reload,
-        log_level=os.getenv("LOG_LEVEL", "info").lower()
+        workers=args.workers,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        access_log=False,
+        log_level=config.log_level
     )
 
 
@@ -1,13 +1,7 @@
 import asyncio
 from app.auth.descope_auth import DescopeAuthenticator
-from app.adapters.google_drive_adapter import  GoogleDriveOAuthHandler
 import os
 from dotenv import load_dotenv
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 load_dotenv()
 async def main():
     descope_auth = DescopeAuthenticator()
@@ -19,6 +13,10 @@ async def main():
 # OAuth Setup Utility
 async def setup_google_drive_oauth():
     """Utility function to set up Google Drive OAuth credentials"""
+    # The Google SDKs are only needed for this flow, so they load here
+    from google_auth_oauthlib.flow import Flow
+    from app.adapters.google_drive_adapter import GoogleDriveOAuthHandler, _write_token
+    
     print("Setting up Google Drive OAuth...")
     
     credentials_path = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
@@ -59,14 +57,14 @@ OAuth Setup:
 4. Paste it here:
         """)
         
-        auth_code = input("Authorization code: ").strip()
+        # Keep the event loop free while waiting on the user, the token endpoint and the disk
+        auth_code = (await asyncio.to_thread(input, "Authorization code: ")).strip()
         
         # Exchange authorization code for credentials
-        flow.fetch_token(code=auth_code)
+        await asyncio.to_thread(flow.fetch_token, code=auth_code)
         
         # Save credentials
-        with open(oauth_handler.token_path, 'w') as token_file:
-            token_file.write(flow.credentials.to_json())
+        await asyncio.to_thread(_write_token, oauth_handler.token_path, flow.credentials.to_json())
         
         print(f"✅ Google Drive OAuth setup complete! Credentials saved to {oauth_handler.token_path}")
         return True
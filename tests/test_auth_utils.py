@@ -0,0 +1,81 @@
+import time
+
+import httpx
+import jwt
+import pytest
+
+from app.utils import auth
+
+
+@pytest.fixture
+def descope(monkeypatch):
+    """Fake Descope validate endpoint; returns the list of requests it served"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"userId": "u", "email": "u@example.com"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(auth, "_get_descope_http_client", lambda: client)
+    auth._validation_cache.clear()
+    yield requests
+    auth._validation_cache.clear()
+
+
+def _token(expires_in: float) -> str:
+    return jwt.encode({"sub": "u", "exp": int(time.time() + expires_in)}, "secret-key-for-tests-only-0123456789", algorithm="HS256")
+
+
+@pytest.mark.asyncio
+async def test_validation_is_cached_no_longer_than_token_expiry(descope):
+    token = _token(5)
+
+    await auth.validate_with_descope(auth.get_descope_client(), token)
+    await auth.validate_with_descope(auth.get_descope_client(), token)
+
+    assert len(descope) == 1
+    (_, expires_at), = auth._validation_cache.values()
+    assert expires_at <= time.time() + 5
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_not_cached(descope):
+    token = _token(-5)
+
+    await auth.validate_with_descope(auth.get_descope_client(), token)
+    await auth.validate_with_descope(auth.get_descope_client(), token)
+
+    assert len(descope) == 2
+
+
+@pytest.mark.asyncio
+async def test_token_without_expiry_is_cached_for_the_default_ttl(descope):
+    await auth.validate_with_descope(auth.get_descope_client(), "opaque-session-token")
+
+    (_, expires_at), = auth._validation_cache.values()
+    assert time.time() + 55 < expires_at <= time.time() + auth._VALIDATION_CACHE_TTL
+
+
+@pytest.mark.parametrize("token", ["", "short-token"])
+@pytest.mark.asyncio
+async def test_missing_or_short_token_is_rejected(monkeypatch, descope, token):
+    monkeypatch.setattr(auth, "_AUTH_ENABLED", True)
+
+    user = await auth.authenticate_user(token)
+
+    assert user.authenticated is False
+    assert user.access_token is None
+    assert not auth.has_required_scopes(user, [])
+    assert descope == []
+
+
+@pytest.mark.asyncio
+async def test_mock_user_has_its_granted_scopes(monkeypatch):
+    monkeypatch.setattr(auth, "_AUTH_ENABLED", False)
+
+    user = await auth.authenticate_user("x" * 20)
+
+    assert user.authenticated is True
+    assert auth.has_required_scopes(user, ["gdrive:read"])
+    assert not auth.has_required_scopes(user, ["gdrive:write"])
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from fastapi import Request
+
+from app.auth import cequence_gateway
+from app.auth.cequence_gateway import CequenceGateway, _build_indicator_matcher
+
+
+@pytest.fixture
+def enabled_gateway(monkeypatch):
+    monkeypatch.setenv("CEQUENCE_ENABLED", "true")
+    monkeypatch.setenv("CEQUENCE_API_ENDPOINT", "https://cequence.test")
+    monkeypatch.setenv("CEQUENCE_API_KEY", "test-key")
+    monkeypatch.setenv("CEQUENCE_TENANT_ID", "tenant")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    return CequenceGateway()
+
+
+def test_client_pool_keeps_http2_and_limits(enabled_gateway):
+    enabled_gateway._initialize_client()
+
+    pool = enabled_gateway.client._transport._pool
+    assert pool._http2 is True
+    assert pool._max_connections == 1000
+    assert pool._max_keepalive_connections == 100
+    assert pool._keepalive_expiry == 75
+
+
+@pytest.fixture(params=["ahocorasick", "regex"])
+def matcher(request, monkeypatch):
+    if request.param == "regex":
+        monkeypatch.setattr(cequence_gateway, "ahocorasick", None)
+    elif cequence_gateway.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    return _build_indicator_matcher()
+
+
+@pytest.mark.parametrize("text, indicator", [
+    ("sqlmap/1.7.2#stable (https://sqlmap.org)", "sqlmap"),
+    ("mozilla/5.0 (compatible; nmap scripting engine)", "nmap"),
+    ("/search q=1 union select password from users", "union select"),
+    ("/document ../../etc/passwd", "../"),
+    ("/search q=<script>alert(1)</script>", "<script"),
+])
+def test_indicators_match_as_whole_tokens(matcher, text, indicator):
+    assert indicator in [found for found, _ in matcher(text)]
+
+
+@pytest.mark.parametrize("text", [
+    "/search q=unmapped",
+    "/search q=sqlmapper-docs",
+    "/search q=finessuses gobusters",
+    "/search q=reunion selection",
+])
+def test_indicators_inside_longer_words_do_not_match(matcher, text):
+    assert matcher(text) == []
+
+
+def _request(path: str, query: str = "") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [],
+        "client": ("203.0.113.7", 1234),
+        "server": ("testserver", 80),
+        "scheme": "http",
+    })
+
+
+@pytest.fixture
+def analyses(enabled_gateway, monkeypatch):
+    """Record every request the gateway sends to Cequence for analysis"""
+    sent = []
+
+    async def send_for_analysis(request_data):
+        sent.append(request_data)
+        await asyncio.sleep(0)
+        return {"risk_score": 0.1}
+
+    monkeypatch.setattr(enabled_gateway, "_send_for_analysis", send_for_analysis)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_verdicts_are_cached_per_query(enabled_gateway, analyses):
+    await enabled_gateway.analyze_request(_request("/search", "q=alpha"))
+    await enabled_gateway.analyze_request(_request("/search", "q=alpha"))
+    await enabled_gateway.analyze_request(_request("/search", "q=beta"))
+
+    assert [sent["query_params"] for sent in analyses] == [{"q": "alpha"}, {"q": "beta"}]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_an_analysis_only_for_the_same_query(enabled_gateway, analyses):
+    await asyncio.gather(
+        enabled_gateway.analyze_request(_request("/search", "q=alpha")),
+        enabled_gateway.analyze_request(_request("/search", "q=alpha")),
+        enabled_gateway.analyze_request(_request("/search", "q=beta")),
+    )
+
+    assert sorted(sent["query_params"]["q"] for sent in analyses) == ["alpha", "beta"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_a_shared_analysis(enabled_gateway, monkeypatch):
+    release = asyncio.Event()
+    sent = []
+
+    async def send_for_analysis(request_data):
+        sent.append(request_data)
+        await release.wait()
+        return {"risk_score": 0.1}
+
+    monkeypatch.setattr(enabled_gateway, "_send_for_analysis", send_for_analysis)
+    leader = asyncio.create_task(enabled_gateway.analyze_request(_request("/search", "q=alpha")))
+    follower = asyncio.create_task(enabled_gateway.analyze_request(_request("/search", "q=alpha")))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+
+    assert (await follower)["allowed"] is True
+    assert leader.cancelled()
+    assert len(sent) == 1
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.claude_mcp_client import _BatchLoader, _ToolCall
+
+
+@pytest.fixture
+def server():
+    """Fake remote MCP server; records the number of calls in every request"""
+    sizes = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if request.url.path == "/mcp/call-tool":
+            sizes.append(1)
+            return httpx.Response(200, json={"success": True, "result": [body["name"]]})
+        sizes.append(len(body["calls"]))
+        if len(body["calls"]) > 20:
+            return httpx.Response(422, json={"detail": "too many calls"})
+        results = [{"success": True, "result": [call["name"]]} for call in body["calls"]]
+        return httpx.Response(200, json={"results": results})
+
+    client = httpx.AsyncClient(base_url="http://mcp.test", transport=httpx.MockTransport(handler))
+    return client, sizes
+
+
+@pytest.mark.asyncio
+async def test_lone_call_uses_the_single_call_endpoint(server):
+    client, sizes = server
+    loader = _BatchLoader(client)
+
+    assert await loader.load(_ToolCall(name="only", arguments={})) == {"success": True, "result": ["only"]}
+    assert sizes == [1]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_batch(server):
+    client, sizes = server
+    loader = _BatchLoader(client)
+
+    results = await asyncio.gather(*(loader.load(_ToolCall(name=f"t{i}", arguments={})) for i in range(3)))
+
+    assert [result["result"] for result in results] == [["t0"], ["t1"], ["t2"]]
+    assert sizes == [3]
+
+
+@pytest.mark.asyncio
+async def test_batches_never_exceed_the_server_limit(server):
+    client, sizes = server
+    loader = _BatchLoader(client, max_batch=20)
+
+    results = await asyncio.gather(*(loader.load(_ToolCall(name=f"t{i}", arguments={})) for i in range(45)))
+
+    assert [result["result"] for result in results] == [[f"t{i}"] for i in range(45)]
+    assert sorted(sizes) == [5, 20, 20]
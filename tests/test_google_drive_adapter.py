@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.adapters import google_drive_adapter
+from app.adapters.google_drive_adapter import GoogleDriveAdapter
+from app.models.models import UserContext
+
+_GOOGLE_DOC = "application/vnd.google-apps.document"
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    """Adapter wired to a fake Drive API; requests records every call made"""
+    files = {
+        "doc1": {"id": "doc1", "name": "Doc", "mimeType": _GOOGLE_DOC},
+        "txt1": {"id": "txt1", "name": "Notes", "mimeType": "text/plain"},
+    }
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/drive/v3/files":
+            # An endless listing: every page is full and points at another
+            page_size = int(request.url.params["pageSize"])
+            listed = [{"id": f"f{i}", "name": "File", "mimeType": "text/plain"} for i in range(page_size)]
+            return httpx.Response(200, json={"files": listed, "nextPageToken": "next"})
+        file_id = request.url.path.split("/")[4]
+        if file_id not in files:
+            return httpx.Response(404, json={"error": "not found"})
+        if request.url.path.endswith("/export"):
+            return httpx.Response(200, text="exported text")
+        if request.url.params.get("alt") == "media":
+            if files[file_id]["mimeType"] == _GOOGLE_DOC:
+                return httpx.Response(403, json={"error": "use export"})
+            return httpx.Response(200, text="file text")
+        return httpx.Response(200, json=files[file_id])
+
+    client = httpx.AsyncClient(base_url=google_drive_adapter._API_BASE_URL, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(google_drive_adapter, "_get_http_client", lambda: client)
+
+    adapter = GoogleDriveAdapter(UserContext(user_id="u", email="u@example.com"))
+    adapter.use_production_api = True
+    adapter._credentials = SimpleNamespace(token="token")
+
+    async def credentials():
+        return adapter._credentials
+
+    monkeypatch.setattr(adapter, "_get_credentials", credentials)
+    return adapter, requests
+
+
+@pytest.mark.asyncio
+async def test_workspace_document_is_exported_without_media_request(drive):
+    adapter, requests = drive
+
+    document = await adapter._fetch_document("doc1")
+
+    assert document.content == "exported text"
+    assert [request.url.path for request in requests] == ["/drive/v3/files/doc1", "/drive/v3/files/doc1/export"]
+    assert "range" not in requests[1].headers
+
+
+@pytest.mark.asyncio
+async def test_binary_file_is_downloaded_with_range(drive):
+    adapter, requests = drive
+
+    document = await adapter._fetch_document("txt1")
+
+    assert document.content == "file text"
+    assert len(requests) == 2
+    assert requests[1].url.params["alt"] == "media"
+    assert requests[1].headers["range"] == google_drive_adapter._CONTENT_RANGE["Range"]
+
+
+@pytest.mark.asyncio
+async def test_missing_document_makes_only_the_metadata_request(drive):
+    adapter, requests = drive
+
+    with pytest.raises(Exception, match="not found"):
+        await adapter._fetch_document("missing")
+
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_search_listing_is_capped_whatever_max_results_asks_for(drive):
+    adapter, requests = drive
+
+    results = await adapter.search("report", max_results=1_000_000)
+
+    assert len(results) == google_drive_adapter._MAX_LISTED_FILES
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_a_shared_fetch(drive, monkeypatch):
+    adapter, _ = drive
+    release = asyncio.Event()
+    fetched = []
+
+    async def fetch_document(doc_id):
+        fetched.append(doc_id)
+        await release.wait()
+        return await fetch_txt(doc_id)
+
+    fetch_txt = adapter._fetch_document
+    monkeypatch.setattr(adapter, "_fetch_document", fetch_document)
+    google_drive_adapter._document_cache.clear()
+
+    leader = asyncio.create_task(adapter.get_document("txt1"))
+    follower = asyncio.create_task(adapter.get_document("txt1"))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+
+    document = await follower
+    assert document.content == "file text"
+    assert leader.cancelled()
+    assert fetched == ["txt1"]
+    google_drive_adapter._document_cache.clear()
@@ -0,0 +1,26 @@
+from app.models.models import UserContext
+
+
+def test_user_context_json_round_trip_with_defaults():
+    user = UserContext(user_id="a", email="b")
+
+    restored = UserContext.model_validate_json(user.model_dump_json())
+
+    assert restored.model_dump() == user.model_dump()
+    assert restored.permissions == {}
+    assert restored.metadata == {}
+
+
+def test_user_context_json_round_trip_with_values():
+    user = UserContext(
+        user_id="a",
+        email="b",
+        scopes=["gdrive:read"],
+        permissions={"drive": ["read"]},
+        metadata={"name": "A"},
+    )
+
+    restored = UserContext.model_validate_json(user.model_dump_json())
+
+    assert restored.model_dump() == user.model_dump()
+    assert restored.scope_set == frozenset({"gdrive:read"})
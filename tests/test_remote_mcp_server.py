@@ -0,0 +1,161 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.auth.cequence_gateway import get_gateway
+from app.models.models import UserContext
+from app import remote_mcp_server
+from app.remote_mcp_server import SearchRequest, app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_requests_release_their_concurrency_slot(client):
+    gateway = app.state.gateway
+
+    assert client.get("/mcp/info").status_code == 200
+    assert gateway._active_requests == {}
+
+
+def test_client_over_concurrency_cap_gets_429(client, monkeypatch):
+    gateway = app.state.gateway
+    monkeypatch.setattr(gateway, "max_concurrent_requests", 2)
+    # Two requests from the test client are already in flight
+    monkeypatch.setitem(gateway._active_requests, "testclient", 2)
+
+    response = client.get("/mcp/info")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Rate limit exceeded - too many concurrent requests"}
+    assert gateway._active_requests["testclient"] == 2
+
+
+def test_health_is_not_subject_to_concurrency_cap(client, monkeypatch):
+    gateway = app.state.gateway
+    monkeypatch.setattr(gateway, "max_concurrent_requests", 0)
+
+    assert client.get("/health").status_code == 200
+
+
+def _batch(count):
+    return {"calls": [{"name": "unknown_tool"} for _ in range(count)]}
+
+
+def test_batch_runs_each_call(client):
+    response = client.post("/mcp/call-tool-batch", json=_batch(2))
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["tool_name"] for result in results] == ["unknown_tool", "unknown_tool"]
+
+
+def test_oversized_batch_is_rejected(client):
+    from app.remote_mcp_server import _MAX_BATCH_CALLS
+
+    response = client.post("/mcp/call-tool-batch", json=_batch(_MAX_BATCH_CALLS + 1))
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("calls", [["search_workplace"], [{"arguments": {}}], [{"name": ""}]])
+def test_malformed_batch_entries_are_rejected(client, calls):
+    response = client.post("/mcp/call-tool-batch", json={"calls": calls})
+
+    assert response.status_code == 422
+
+
+def test_batch_charges_rate_limit_per_call(client, monkeypatch):
+    gateway = app.state.gateway
+    monkeypatch.setattr(gateway.config, "enabled", True)
+    monkeypatch.setattr(gateway, "per_minute_limit", 3)
+
+    assert client.post("/mcp/call-tool-batch", json=_batch(3)).status_code == 200
+    assert client.post("/mcp/call-tool-batch", json=_batch(1)).status_code == 429
+
+
+@pytest.mark.parametrize("max_results", [0, 101, 1_000_000])
+def test_search_request_bounds_max_results(max_results):
+    with pytest.raises(ValidationError):
+        SearchRequest(query="q", user_token="t", max_results=max_results)
+
+
+def test_search_uses_the_injected_gateway(client, monkeypatch):
+    monkeypatch.delenv("GOOGLE_DRIVE_PRODUCTION", raising=False)
+    events = []
+    app.dependency_overrides[get_gateway] = lambda: SimpleNamespace(
+        config=SimpleNamespace(enabled=True),
+        enqueue_analytics=events.append
+    )
+    try:
+        response = client.post(
+            "/search",
+            json={"query": "report", "user_token": "t"},
+            headers={"Authorization": "Bearer dev-token"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [event["event_type"] for event in events] == ["search"]
+
+
+@pytest.mark.asyncio
+async def test_cached_user_contexts_do_not_hold_the_token(monkeypatch):
+    monkeypatch.setattr(remote_mcp_server.descope_auth, "enabled", False)
+    monkeypatch.setattr(remote_mcp_server, "auth_redis", None)
+    token = "bearer-token-for-cache-test"
+
+    user = await remote_mcp_server.resolve_user(token)
+
+    cached = remote_mcp_server.authenticated_users.pop(remote_mcp_server._token_key(token))
+    assert cached is user
+    assert user.access_token is None
+
+
+@pytest.mark.asyncio
+async def test_shared_user_cache_never_stores_the_token(monkeypatch):
+    stored = {}
+
+    async def set_(key, value, ex):
+        stored[key] = value
+
+    monkeypatch.setattr(remote_mcp_server, "auth_redis", SimpleNamespace(set=set_))
+    user = UserContext(user_id="u", email="u@example.com", access_token="raw-bearer-token")
+
+    await remote_mcp_server._store_shared_user(b"key", user)
+
+    assert b"raw-bearer-token" not in stored[b"user:key"].encode()
+    assert UserContext.model_validate_json(stored[b"user:key"]).user_id == "u"
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_a_cancelled_caller():
+    release = asyncio.Event()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await release.wait()
+        return "verified"
+
+    inflight = {}
+    leader = asyncio.create_task(remote_mcp_server._single_flight(inflight, b"key", work))
+    follower = asyncio.create_task(remote_mcp_server._single_flight(inflight, b"key", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    release.set()
+
+    assert await follower == "verified"
+    assert leader.cancelled()
+    assert runs == [1]
+    await asyncio.sleep(0)
+    assert inflight == {}
@@ -0,0 +1,94 @@
+import pytest
+
+from app.models.models import DocumentContent, DocumentSource, RecentUpdate, SearchResult, SummaryResult, UserContext
+from app.services import search_service
+
+
+def _fields(doc_id: str, last_modified: str = "2024-01-01T00:00:00Z") -> dict:
+    return {
+        "id": doc_id,
+        "title": f"Title {doc_id}",
+        "url": f"https://example.com/{doc_id}",
+        "source": DocumentSource.gdrive,
+        "last_modified": last_modified,
+        "author": "Ada",
+    }
+
+
+class FakeDriveAdapter:
+    """Stands in for GoogleDriveAdapter and records what it was asked for"""
+    
+    def __init__(self):
+        self.searches = []
+        self.fetched = []
+    
+    async def search(self, query, max_results):
+        self.searches.append((query, max_results))
+        return [SearchResult(snippet=query, **_fields(f"r{i}")) for i in range(max_results + 2)]
+    
+    async def get_documents(self, doc_ids):
+        self.fetched.append(doc_ids)
+        return [DocumentContent(content=f"body of {doc_id}", **_fields(doc_id)) for doc_id in doc_ids]
+    
+    async def get_recent_updates(self, days):
+        return [
+            RecentUpdate(snippet="", **_fields(f"u{day}", f"2024-01-{day:02d}T00:00:00Z"))
+            for day in (3, 9, 1, 7)
+        ]
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    fake = FakeDriveAdapter()
+    monkeypatch.setattr(search_service, "initialize_adapters", lambda _user: {DocumentSource.gdrive: fake})
+    search_service.result_cache.clear()
+    yield fake
+    search_service.result_cache.clear()
+
+
+@pytest.fixture
+def user():
+    return UserContext(user_id="u", email="u@example.com", scopes=["gdrive:read"])
+
+
+@pytest.mark.asyncio
+async def test_search_documents_limits_and_caches_results(adapter, user):
+    first = await search_service.search_documents("budget", [DocumentSource.gdrive], 3, user)
+    second = await search_service.search_documents("budget", [DocumentSource.gdrive], 3, user)
+
+    assert [result.id for result in first] == ["r0", "r1", "r2"]
+    assert second == first
+    assert adapter.searches == [("budget", 3)]
+
+
+@pytest.mark.asyncio
+async def test_search_documents_skips_sources_without_read_scope(adapter):
+    user = UserContext(user_id="u", email="u@example.com", scopes=["notion:read"])
+
+    assert await search_service.search_documents("budget", [DocumentSource.gdrive], 3, user) == []
+    assert adapter.searches == []
+
+
+@pytest.mark.asyncio
+async def test_search_documents_requires_authentication(adapter):
+    user = UserContext(user_id="", email="", authenticated=False, scopes=["gdrive:read"])
+
+    with pytest.raises(Exception, match="not authenticated"):
+        await search_service.search_documents("budget", [DocumentSource.gdrive], 3, user)
+
+
+@pytest.mark.asyncio
+async def test_summarize_content_groups_ids_by_source(adapter, user):
+    summary = await search_service.summarize_content(["gdrive:a", "gdrive:b", "malformed"], 12, user)
+
+    assert isinstance(summary, SummaryResult)
+    assert adapter.fetched == [["a", "b"]]
+    assert summary.summary == "body of a bo"
+    assert [doc.id for doc in summary.source_documents] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_get_recent_updates_returns_newest_first(adapter, user):
+    updates = await search_service.get_recent_updates([DocumentSource.gdrive], 7, 2, user)
+
+    assert [update.id for update in updates] == ["u9", "u7"]